@@ -1,25 +1,275 @@
-from flask import Flask, render_template, request, jsonify, make_response
+import time
+startup_started = time.perf_counter()
+from flask import Flask, render_template, request, jsonify, make_response, url_for, redirect, send_from_directory, g
 from flask_sqlalchemy import SQLAlchemy
-from transformers import pipeline
+from sqlalchemy import event, text
+from sqlalchemy.dialects.sqlite import insert as sqlite_insert
 import os
 import hashlib
 import random
 import threading
-import time
 import logging
+from logging.handlers import QueueHandler, QueueListener
+import queue
+import json
+import socket
+import subprocess
+import sys
+import atexit
+import math
+import base64
+import bisect
+import itertools
+import gzip
+import io
+import mimetypes
+import sqlite3
+import tempfile
 from flask_socketio import SocketIO, join_room, leave_room, send, emit, rooms
+from socketio import PubSubManager, RedisManager, KafkaManager, ZmqManager, KombuManager
 from datetime import datetime, timezone, date
 import re
-from collections import Counter
-from bs4 import BeautifulSoup
+from collections import Counter, OrderedDict, deque
+from bs4 import BeautifulSoup, SoupStrainer
 import requests
-import uuid
+from requests.adapters import HTTPAdapter
 from urllib.parse import urljoin, urlparse
+from werkzeug.security import safe_join
+from werkzeug.middleware.proxy_fix import ProxyFix
+from werkzeug.exceptions import NotFound
 from datetime import datetime, timezone, date, timedelta
+from concurrent.futures import ThreadPoolExecutor, wait
+from itertools import combinations
 from flask_cors import CORS
-
-logging.basicConfig(level=logging.DEBUG, format='%(asctime)s %(levelname)s:%(name)s: %(message)s')
+try:
+    import brotli
+except ImportError:
+    brotli = None
+try:
+    import fcntl
+except ImportError:
+    fcntl = None
+    import msvcrt
+from contextlib import contextmanager
+try:
+    from eventlet import patcher as eventlet_patcher
+except ImportError:
+    eventlet_patcher = None
+try:
+    from PIL import Image, features as image_features
+except ImportError:
+    Image = None
+
+# ---------------------------- LOGGING ---------------------------- #
+
+# LOG_LEVEL sets the root level and LOG_LEVELS overrides single loggers, e.g.
+# "socketio.server=INFO,werkzeug=WARNING". Handlers only see a queue: records
+# are written to stderr by a listener thread, so a request never waits on the
+# terminal. Per-item and per-message sites log through hot_logger, whose
+# filter lets LOG_SAMPLE_BURST records per call site through every
+# LOG_SAMPLE_INTERVAL seconds and reports how many it dropped.
+# Under eventlet's monkey patching threading.Thread is a green thread, which
+# would only write when the hub lets it and stall the hub while it does, so
+# the listener, its queue and the stream lock come from the unpatched modules
+# and run on a real OS thread.
+LOG_LEVEL = os.getenv('LOG_LEVEL', 'INFO').upper()
+LOG_LEVELS = os.getenv('LOG_LEVELS', '')
+LOG_FORMAT = '%(asctime)s %(levelname)s:%(name)s: %(message)s'
+LOG_SAMPLE_INTERVAL = float(os.getenv('LOG_SAMPLE_INTERVAL', '10'))
+LOG_SAMPLE_BURST = int(os.getenv('LOG_SAMPLE_BURST', '5'))
+SOCKETIO_LOGS = os.getenv('SOCKETIO_LOGS', '0') == '1'
+
+class SampleFilter(logging.Filter):
+    def __init__(self, interval, burst):
+        super().__init__()
+        self.interval = interval
+        self.burst = burst
+        self.windows = {}  # (pathname, lineno) -> [window start, passed, dropped]
+        self.lock = threading.Lock()
+
+    def filter(self, record):
+        key = (record.pathname, record.lineno)
+        now = time.monotonic()
+        with self.lock:
+            window = self.windows.get(key)
+            if window is None or now - window[0] >= self.interval:
+                dropped = window[2] if window else 0
+                window = self.windows[key] = [now, 0, 0]
+                if dropped:
+                    record.msg = f"{record.msg} (+{dropped} similar dropped)"
+            if window[1] < self.burst:
+                window[1] += 1
+                return True
+            window[2] += 1
+            return False
+
+os_threading = eventlet_patcher.original('threading') if eventlet_patcher else threading
+os_queue = eventlet_patcher.original('queue') if eventlet_patcher else queue
+
+class OSThreadQueueListener(QueueListener):
+    def start(self):
+        self._thread = os_threading.Thread(target=self._monitor, name='log-listener', daemon=True)
+        self._thread.start()
+
+def setup_logging():
+    root = logging.getLogger()
+    root.setLevel(LOG_LEVEL)
+    for entry in filter(None, (part.strip() for part in LOG_LEVELS.split(','))):
+        name, _, level = entry.partition('=')
+        logging.getLogger(name.strip()).setLevel(level.strip().upper())
+    stream = logging.StreamHandler()
+    stream.setFormatter(logging.Formatter(LOG_FORMAT))
+    stream.lock = os_threading.RLock()
+    records = os_queue.Queue()
+    root.handlers[:] = [QueueHandler(records)]
+    listener = OSThreadQueueListener(records, stream, respect_handler_level=True)
+    listener.start()
+    atexit.register(listener.stop)
+    return listener
+
+log_listener = setup_logging()
 logger = logging.getLogger(__name__)
+hot_logger = logging.getLogger(f"{__name__}.hot")
+hot_logger.addFilter(SampleFilter(LOG_SAMPLE_INTERVAL, LOG_SAMPLE_BURST))
+
+# STARTUP_MODE=slim is for workers that only serve chat or the API: the
+# summarizer is never imported there and no trends are queued for it.
+STARTUP_MODE = os.getenv('STARTUP_MODE', 'full')
+SUMMARIES_ENABLED = STARTUP_MODE != 'slim'
+startup_timings = []
+startup_mark = startup_started
+
+def mark_startup(phase):
+    global startup_mark
+    now = time.perf_counter()
+    startup_timings.append((phase, round(now - startup_mark, 4)))
+    startup_mark = now
+
+mark_startup('imports')
+
+# ---------------------------- MESSAGE QUEUE ---------------------------- #
+
+# MESSAGE_QUEUE lets several workers share rooms. Empty keeps everything in
+# process; redis://, amqp://, kafka:// and zmq+tcp:// URLs go to the backends
+# that ship with python-socketio; unix:///some/dir uses UnixSocketManager
+# below, which needs no broker and suits a single host or local testing.
+MESSAGE_QUEUE = os.getenv('MESSAGE_QUEUE', '')
+MESSAGE_QUEUE_CHANNEL = os.getenv('MESSAGE_QUEUE_CHANNEL', 'trendy')
+MESSAGE_QUEUE_TIMEOUT = float(os.getenv('MESSAGE_QUEUE_TIMEOUT', '2'))
+# Events named here are for the workers, not the browsers: every worker,
+# the sender included, hands the payload to the registered function instead
+# of emitting it (see CHAT HISTORY)
+queue_event_handlers = {}
+
+class WorkerEventsMixin:
+    # Mixed into whichever manager MESSAGE_QUEUE picks; the one place that
+    # reaches into python-socketio's emit handling, pinned in requirements.txt
+    started = False
+
+    def _handle_emit(self, message):
+        handler = queue_event_handlers.get(message.get('event'))
+        if handler is None:
+            return super()._handle_emit(message)
+        handler(message['data'][0])
+
+    def initialize(self):
+        # Called at startup below and again by the server on the first
+        # connection, which would be too late to hear other workers
+        if not self.started:
+            self.started = True
+            super().initialize()
+
+class UnixSocketManager(WorkerEventsMixin, PubSubManager):
+    # Every worker listens on <dir>/<host_id>.sock and publishes by writing
+    # one JSON line to each other socket in the directory. Sockets nobody is
+    # listening on belong to workers that died and are removed. The sender's
+    # own clients are served by PubSubManager.emit itself, which python-socketio
+    # only does from 5.10 on; requirements.txt pins a version that does.
+    name = 'unix'
+
+    def __init__(self, url, channel='flask-socketio', write_only=False, logger=None, json=None):
+        super().__init__(channel=channel, write_only=write_only, logger=logger, json=json)
+        self.directory = url[len('unix://'):]
+        os.makedirs(self.directory, exist_ok=True)
+        self.path = os.path.join(self.directory, f"{self.host_id}.sock")
+
+    def socket_module(self):
+        if self.server is not None and self.server.async_mode == 'eventlet':
+            from eventlet.green import socket as green_socket
+            return green_socket
+        return socket
+
+    def peers(self):
+        for name in os.listdir(self.directory):
+            path = os.path.join(self.directory, name)
+            if name.endswith('.sock') and path != self.path:
+                yield path
+
+    def _publish(self, data):
+        line = (self.json.dumps({'channel': self.channel, 'data': data}) + '\n').encode('utf-8')
+        sockets = self.socket_module()
+        for path in self.peers():
+            peer = sockets.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+            peer.settimeout(MESSAGE_QUEUE_TIMEOUT)
+            try:
+                peer.connect(path)
+                peer.sendall(line)
+            except (ConnectionRefusedError, FileNotFoundError):
+                logger.warning(f"Removing stale queue socket {path}")
+                try:
+                    os.unlink(path)
+                except OSError:
+                    pass
+            except OSError as e:
+                logger.warning(f"Could not publish to {path}: {e}")
+            finally:
+                peer.close()
+
+    def _listen(self):
+        sockets = self.socket_module()
+        listener = sockets.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+        if os.path.exists(self.path):
+            os.unlink(self.path)
+        listener.bind(self.path)
+        listener.listen(128)
+        atexit.register(self.remove_socket)
+        while True:
+            conn, _ = listener.accept()
+            conn.settimeout(MESSAGE_QUEUE_TIMEOUT)
+            try:
+                for line in conn.makefile('rb'):
+                    message = self.json.loads(line)
+                    if message.get('channel') == self.channel:
+                        yield message['data']
+            except (OSError, ValueError) as e:
+                logger.warning(f"Dropped queue message: {e}")
+            finally:
+                conn.close()
+
+    def remove_socket(self):
+        try:
+            os.unlink(self.path)
+        except OSError:
+            pass
+
+def queue_manager_class(url):
+    # The same choice Flask-SocketIO makes for message_queue=url
+    if url.startswith('unix://'):
+        return UnixSocketManager
+    if url.startswith(('redis://', 'rediss://')):
+        base = RedisManager
+    elif url.startswith('kafka://'):
+        base = KafkaManager
+    elif url.startswith('zmq'):
+        base = ZmqManager
+    else:
+        base = KombuManager
+    return type(base.__name__, (WorkerEventsMixin, base), {})
+
+def message_queue_options():
+    if not MESSAGE_QUEUE:
+        return {}
+    return {'client_manager': queue_manager_class(MESSAGE_QUEUE)(MESSAGE_QUEUE, channel=MESSAGE_QUEUE_CHANNEL)}
 
 app = Flask(__name__)
 app.config['SECRET_KEY'] = os.getenv('FLASK_SECRET_KEY', 'your-secret-key-here')  # Set in Render
@@ -32,14 +282,161 @@ socketio = SocketIO(
         "http://localhost:5000"
     ],
     async_mode='eventlet',
-    logger=True,
-    engineio_logger=True,
+    logger=SOCKETIO_LOGS,
+    engineio_logger=SOCKETIO_LOGS,
     ping_timeout=60,
-    ping_interval=25
+    ping_interval=25,
+    **message_queue_options()
 )
-
-db_path = '/opt/render/data/trendy.db' if os.getenv('RENDER') else os.path.join(os.path.abspath(os.path.dirname(__file__)), 'trendy.db')
-if os.getenv('RENDER'):
+if MESSAGE_QUEUE:
+    socketio.server.manager.initialize()
+
+# Rate limits and logs key on request.remote_addr, which behind Render's proxy
+# is the proxy itself. PROXY_HOPS is how many proxies in front of the app
+# append to X-Forwarded-For; only those entries are trusted, so a client
+# cannot pick its own address. Wrapping outside the Socket.IO middleware
+# gives socket handlers the same address as HTTP routes.
+PROXY_HOPS = int(os.getenv('PROXY_HOPS', '1' if os.getenv('RENDER') else '0'))
+if PROXY_HOPS:
+    app.wsgi_app = ProxyFix(app.wsgi_app, x_for=PROXY_HOPS, x_proto=PROXY_HOPS, x_host=PROXY_HOPS)
+
+# ---------------------------- METRICS ---------------------------- #
+
+# A small Prometheus registry scraped at /metrics. Each metric is split into
+# METRIC_SHARDS shards with a lock apiece and every thread (or greenlet)
+# records into its own fixed shard, so writers almost never wait on each
+# other; a scrape adds the shards up. Values that are cheaper to read than
+# to track, like room counts or snapshot age, come from callbacks instead.
+METRIC_SHARDS = 8
+LATENCY_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 30)
+QUERY_BUCKETS = (0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 1)
+metrics_registry = []
+metric_shard_local = threading.local()
+metric_shard_counter = itertools.count()
+
+def metric_shard():
+    index = getattr(metric_shard_local, 'index', None)
+    if index is None:
+        index = metric_shard_local.index = next(metric_shard_counter) % METRIC_SHARDS
+    return index
+
+class Metric:
+    def __init__(self, name, documentation, kind, labelnames=(), buckets=None, callback=None):
+        self.name = name
+        self.documentation = documentation
+        self.kind = kind
+        self.labelnames = labelnames
+        self.buckets = buckets
+        self.callback = callback
+        self.shards = [({}, threading.Lock()) for _ in range(METRIC_SHARDS)]
+        metrics_registry.append(self)
+
+    def inc(self, amount=1, *labels):
+        values, lock = self.shards[metric_shard()]
+        with lock:
+            values[labels] = values.get(labels, 0) + amount
+
+    def dec(self, amount=1, *labels):
+        self.inc(-amount, *labels)
+
+    def observe(self, value, *labels):
+        index = bisect.bisect_left(self.buckets, value)
+        values, lock = self.shards[metric_shard()]
+        with lock:
+            counts = values.get(labels)
+            if counts is None:
+                counts = values[labels] = [0] * (len(self.buckets) + 1) + [0.0]
+            counts[index] += 1
+            counts[-1] += value
+
+    def collect(self):
+        if self.callback:
+            return self.callback()
+        merged = {}
+        for values, lock in self.shards:
+            with lock:
+                items = [(labels, list(value) if isinstance(value, list) else value) for labels, value in values.items()]
+            for labels, value in items:
+                if labels not in merged:
+                    merged[labels] = value
+                elif isinstance(value, list):
+                    merged[labels] = [a + b for a, b in zip(merged[labels], value)]
+                else:
+                    merged[labels] += value
+        return merged
+
+def escape_label(value):
+    return str(value).replace('\\', '\\\\').replace('"', '\\"').replace('\n', '\\n')
+
+def format_labels(names, values, extra=()):
+    pairs = list(zip(names, values)) + list(extra)
+    if not pairs:
+        return ''
+    return '{' + ','.join(f'{name}="{escape_label(value)}"' for name, value in pairs) + '}'
+
+def render_metrics():
+    lines = []
+    for metric in metrics_registry:
+        try:
+            values = metric.collect()
+        except Exception as e:
+            logger.error(f"Error collecting {metric.name}: {e}", exc_info=True)
+            continue
+        lines.append(f"# HELP {metric.name} {metric.documentation}")
+        lines.append(f"# TYPE {metric.name} {metric.kind}")
+        for labels, value in sorted(values.items()):
+            if metric.kind != 'histogram':
+                lines.append(f"{metric.name}{format_labels(metric.labelnames, labels)} {value}")
+                continue
+            cumulative = 0
+            for bound, count in zip(list(metric.buckets) + ['+Inf'], value[:-1]):
+                cumulative += count
+                lines.append(f"{metric.name}_bucket{format_labels(metric.labelnames, labels, [('le', bound)])} {cumulative}")
+            lines.append(f"{metric.name}_sum{format_labels(metric.labelnames, labels)} {value[-1]}")
+            lines.append(f"{metric.name}_count{format_labels(metric.labelnames, labels)} {cumulative}")
+    return '\n'.join(lines) + '\n'
+
+def socket_room_count():
+    rooms_by_name = socketio.server.manager.rooms.get('/', {})
+    sids = set(rooms_by_name.get(None, {}))
+    return {(): sum(1 for room in rooms_by_name if room is not None and room not in sids)}
+
+def snapshot_age():
+    if not last_fetch_time:
+        return {}
+    return {(): round((datetime.now(timezone.utc) - last_fetch_time).total_seconds(), 3)}
+
+FETCH_SECONDS = Metric('trendy_source_fetch_seconds', 'Time to fetch and parse one source.', 'histogram', ('source',), LATENCY_BUCKETS)
+FETCH_ITEMS = Metric('trendy_source_items_total', 'Trends returned by each source.', 'counter', ('source',))
+FETCH_RESULTS = Metric('trendy_source_fetches_total', 'Source fetches by outcome.', 'counter', ('source', 'status'))
+REQUEST_SECONDS = Metric('trendy_request_seconds', 'Flask request latency per route.', 'histogram', ('route', 'method'), LATENCY_BUCKETS)
+REQUESTS = Metric('trendy_requests_total', 'Flask requests per route and status.', 'counter', ('route', 'method', 'status'))
+SUMMARIZER_SECONDS = Metric('trendy_summarizer_seconds', 'Summarizer inference time per batch.', 'histogram', ('mode',), LATENCY_BUCKETS)
+SUMMARIZER_TEXTS = Metric('trendy_summarizer_texts_total', 'Texts sent to the summarizer.', 'counter', ('mode',))
+QUERY_SECONDS = Metric('trendy_sqlite_query_seconds', 'SQLite statement execution time.', 'histogram', ('statement',), QUERY_BUCKETS)
+SOCKET_CONNECTIONS = Metric('trendy_socketio_connections', 'Connected Socket.IO clients.', 'gauge')
+SOCKET_ROOMS = Metric('trendy_socketio_rooms', 'Socket.IO rooms with members, not counting per-client rooms.', 'gauge', callback=socket_room_count)
+TRENDS_SIZE = Metric('trendy_trends', 'Trends in the published snapshot.', 'gauge', callback=lambda: {(): len(trend_snapshot['trends'])})
+TRENDS_AGE = Metric('trendy_trends_age_seconds', 'Seconds since the snapshot was last refreshed.', 'gauge', callback=snapshot_age)
+THROTTLED = Metric('trendy_throttled_total', 'Events refused by the rate limiter.', 'counter', ('action',),
+                   callback=lambda: {(action,): count for action, count in throttle_counts.items()})
+
+@app.before_request
+def start_request_timer():
+    g.request_started = time.perf_counter()
+
+@app.after_request
+def record_request_metrics(response):
+    started = g.pop('request_started', None)
+    if started is not None:
+        route = request.url_rule.rule if request.url_rule else 'unmatched'
+        REQUEST_SECONDS.observe(time.perf_counter() - started, route, request.method)
+        REQUESTS.inc(1, route, request.method, str(response.status_code))
+    return response
+
+# DATABASE_PATH points scripts and benchmarks at a scratch database
+db_path = os.getenv('DATABASE_PATH') or ('/opt/render/data/trendy.db' if os.getenv('RENDER') else os.path.join(os.path.abspath(os.path.dirname(__file__)), 'trendy.db'))
+if os.getenv('RENDER') or os.getenv('DATABASE_PATH'):
     os.makedirs(os.path.dirname(db_path), exist_ok=True)
 app.config['SQLALCHEMY_DATABASE_URI'] = f'sqlite:///{db_path}'
 app.config['SQLALCHEMY_TRACK_MODIFICATIONS'] = False
@@ -52,7 +449,7 @@ class Trend(db.Model):
     description = db.Column(db.Text)
     link = db.Column(db.String)
     source = db.Column(db.String)
-    timestamp = db.Column(db.DateTime, default=lambda: datetime.now(timezone.utc))
+    timestamp = db.Column(db.DateTime, default=lambda: datetime.now(timezone.utc), index=True)
 
 class Vote(db.Model):
     id = db.Column(db.Integer, primary_key=True)
@@ -64,13 +461,341 @@ class Vote(db.Model):
         db.UniqueConstraint('trend_id', 'ip_address', name='unique_vote_per_ip'),
     )
 
-with app.app_context():
+class VoteCount(db.Model):
+    trend_id = db.Column(db.String, primary_key=True)
+    vote_type = db.Column(db.String, primary_key=True)
+    count = db.Column(db.Integer, nullable=False, default=0)
+
+class TrendSummary(db.Model):
+    trend_id = db.Column(db.String, primary_key=True)
+    content_hash = db.Column(db.String, nullable=False)
+    text = db.Column(db.Text, nullable=False)
+    hashtags = db.Column(db.String)
+    meta_description = db.Column(db.String)
+    meta_keywords = db.Column(db.String)
+    timestamp = db.Column(db.DateTime, default=lambda: datetime.now(timezone.utc))
+
+class ChatMessage(db.Model):
+    id = db.Column(db.Integer, primary_key=True)
+    room = db.Column(db.String, nullable=False, index=True)
+    text = db.Column(db.String, nullable=False)
+    timestamp = db.Column(db.DateTime, default=lambda: datetime.now(timezone.utc), index=True)
+
+# ---------------------------- SQLITE TUNING ---------------------------- #
+
+# WAL lets the web process keep reading while the background fetch commits.
+# synchronous=NORMAL is safe with WAL (only the last commits can be lost on
+# power failure, never corruption).
+SQLITE_PRAGMAS = {
+    'journal_mode': 'WAL',
+    'synchronous': 'NORMAL',
+    'busy_timeout': int(os.getenv('SQLITE_BUSY_TIMEOUT', '5000')),
+    'cache_size': -int(os.getenv('SQLITE_CACHE_KB', '20000')),
+    'mmap_size': int(os.getenv('SQLITE_MMAP_SIZE', str(256 * 1024 * 1024))),
+    'temp_store': 'MEMORY'
+}
+
+# create_all() only builds missing tables, so indexes added to existing
+# tables are created here. Vote.trend_id needs no index of its own: the
+# unique (trend_id, ip_address) index already leads with it, and per-trend
+# counts are read from vote_count by primary key.
+MIGRATIONS = [
+    "CREATE INDEX IF NOT EXISTS ix_trend_timestamp ON trend (timestamp)",
+]
+
+# Expected plans (EXPLAIN QUERY PLAN) for the hot queries:
+#   recent_trends   SCAN trend USING INDEX ix_trend_timestamp
+#   old_trends      SEARCH trend USING INDEX ix_trend_timestamp (timestamp<?)
+#   vote_counts     SEARCH vote_count USING INDEX sqlite_autoindex_vote_count_1 (trend_id=?)
+#   existing_vote   SEARCH vote USING COVERING INDEX sqlite_autoindex_vote_1 (trend_id=? AND ip_address=?)
+#   stored_summary  SEARCH trend_summary USING INDEX sqlite_autoindex_trend_summary_1 (trend_id=?)
+HOT_QUERIES = {
+    'recent_trends': ("SELECT * FROM trend ORDER BY timestamp DESC LIMIT 2000", {}),
+    'old_trends': ("SELECT id FROM trend WHERE timestamp < :threshold", {'threshold': '2000-01-01'}),
+    'vote_counts': ("SELECT * FROM vote_count WHERE trend_id IN (:a, :b)", {'a': '', 'b': ''}),
+    'existing_vote': ("SELECT id FROM vote WHERE trend_id = :trend_id AND ip_address = :ip", {'trend_id': '', 'ip': ''}),
+    'stored_summary': ("SELECT * FROM trend_summary WHERE trend_id = :trend_id", {'trend_id': ''})
+}
+
+def start_query_timer(conn, cursor, statement, parameters, context, executemany):
+    conn.info.setdefault('query_started', []).append(time.perf_counter())
+
+def record_query_time(conn, cursor, statement, parameters, context, executemany):
+    started = conn.info['query_started'].pop()
+    QUERY_SECONDS.observe(time.perf_counter() - started, statement.lstrip().split(None, 1)[0].upper())
+
+def set_sqlite_pragmas(dbapi_connection, connection_record):
+    cursor = dbapi_connection.cursor()
+    for name, value in SQLITE_PRAGMAS.items():
+        cursor.execute(f"PRAGMA {name}={value}")
+    cursor.close()
+
+def migrate_database():
+    with db.engine.begin() as connection:
+        for statement in MIGRATIONS:
+            connection.execute(text(statement))
+
+def explain_hot_queries():
+    plans = {}
+    for name, (sql, params) in HOT_QUERIES.items():
+        rows = db.session.execute(text(f"EXPLAIN QUERY PLAN {sql}"), params).fetchall()
+        plans[name] = [row[-1] for row in rows]
+    return plans
+
+def bump_vote_count(trend_id, vote_type, amount=1):
+    # Runs in the caller's transaction so the counter commits with the vote
+    statement = sqlite_insert(VoteCount).values(trend_id=trend_id, vote_type=vote_type, count=amount)
+    statement = statement.on_conflict_do_update(
+        index_elements=['trend_id', 'vote_type'],
+        set_={'count': VoteCount.count + amount}
+    )
+    db.session.execute(statement)
+
+def get_vote_counts(trend_ids):
+    counts = {}
+    trend_ids = list(trend_ids)
+    for i in range(0, len(trend_ids), 500):
+        rows = VoteCount.query.filter(VoteCount.trend_id.in_(trend_ids[i:i + 500])).all()
+        for row in rows:
+            counts.setdefault(row.trend_id, {})[row.vote_type] = row.count
+    for trend_id, pending in pending_vote_counts(trend_ids).items():
+        for vote_type, amount in pending.items():
+            trend_counts = counts.setdefault(trend_id, {})
+            trend_counts[vote_type] = trend_counts.get(vote_type, 0) + amount
+    return counts
+
+def rebuild_vote_counts():
+    try:
+        VoteCount.query.delete()
+        rows = db.session.query(
+            Vote.trend_id,
+            Vote.vote_type,
+            db.func.count().label('count')
+        ).group_by(Vote.trend_id, Vote.vote_type).all()
+        db.session.add_all(VoteCount(trend_id=r.trend_id, vote_type=r.vote_type, count=r.count) for r in rows)
+        db.session.commit()
+        logger.debug(f"Rebuilt {len(rows)} vote counters")
+        return len(rows)
+    except Exception as e:
+        logger.error(f"Error rebuilding vote counts: {e}", exc_info=True)
+        db.session.rollback()
+        raise
+
+@app.cli.command('check-dedup')
+def check_dedup_command():
+    failures = 0
+    for same, title, other in DEDUP_CHECKS:
+        pair = [{'id': 'a', 'title': title, 'source': 'A'}, {'id': 'b', 'title': other, 'source': 'B'}]
+        merged = len(cluster_trends(pair)) == 1
+        score = len(shingles(pair[0]) & shingles(pair[1])) / len(shingles(pair[0]) | shingles(pair[1]))
+        ok = merged == same
+        failures += not ok
+        print(f"{'ok  ' if ok else 'FAIL'} {score:.2f} {'merged' if merged else 'apart '}  {title!r} / {other!r}")
+    if failures:
+        raise SystemExit(f"{failures} dedup check(s) failed")
+
+@app.cli.command('rebuild-vote-counts')
+def rebuild_vote_counts_command():
+    print(f"Rebuilt {rebuild_vote_counts()} vote counters")
+
+# ---------------------------- VOTE INGESTION ---------------------------- #
+
+VOTE_FLUSH_INTERVAL = float(os.getenv('VOTE_FLUSH_INTERVAL', '2'))
+VOTE_BATCH_SIZE = int(os.getenv('VOTE_BATCH_SIZE', '500'))
+VOTE_FILTER_CAPACITY = int(os.getenv('VOTE_FILTER_CAPACITY', '1000000'))
+
+class BloomFilter:
+    def __init__(self, capacity, error_rate=0.01):
+        self.size = max(8, int(-capacity * math.log(error_rate) / (math.log(2) ** 2)))
+        self.hashes = max(1, round(self.size / capacity * math.log(2)))
+        self.bits = bytearray((self.size + 7) // 8)
+
+    def positions(self, key):
+        digest = hashlib.blake2b(key.encode('utf-8'), digest_size=16).digest()
+        first = int.from_bytes(digest[:8], 'little')
+        second = int.from_bytes(digest[8:], 'little') | 1
+        return [(first + i * second) % self.size for i in range(self.hashes)]
+
+    def add(self, key):
+        for position in self.positions(key):
+            self.bits[position >> 3] |= 1 << (position & 7)
+
+    def __contains__(self, key):
+        return all(self.bits[position >> 3] & (1 << (position & 7)) for position in self.positions(key))
+
+vote_lock = threading.Lock()
+vote_queue = []
+vote_pending_keys = set()
+vote_pending_counts = {}
+vote_filter = BloomFilter(VOTE_FILTER_CAPACITY)
+vote_filter_ready = False
+vote_flush_event = threading.Event()
+vote_writer_thread = None
+
+def vote_key(trend_id, ip):
+    return f"{trend_id}|{ip}"
+
+def seed_vote_filter():
+    global vote_filter_ready
+    with app.app_context():
+        seeded = 0
+        for trend_id, ip in db.session.query(Vote.trend_id, Vote.ip_address).yield_per(5000):
+            vote_filter.add(vote_key(trend_id, ip))
+            seeded += 1
+    vote_filter_ready = True
+    logger.debug(f"Vote filter seeded with {seeded} votes")
+
+def accept_vote(trend_id, ip, vote_type):
+    key = vote_key(trend_id, ip)
+    with vote_lock:
+        if key in vote_pending_keys:
+            return False
+        maybe_seen = not vote_filter_ready or key in vote_filter
+    # The filter has no false negatives, so only a possible hit needs the database
+    if maybe_seen and Vote.query.filter_by(trend_id=trend_id, ip_address=ip).first():
+        return False
+    with vote_lock:
+        if key in vote_pending_keys:
+            return False
+        vote_pending_keys.add(key)
+        vote_filter.add(key)
+        vote_queue.append({
+            'trend_id': trend_id,
+            'ip_address': ip,
+            'vote_type': vote_type,
+            'timestamp': datetime.now(timezone.utc)
+        })
+        count_key = (trend_id, vote_type)
+        vote_pending_counts[count_key] = vote_pending_counts.get(count_key, 0) + 1
+        queued = len(vote_queue)
+    start_vote_writer()
+    if queued >= VOTE_BATCH_SIZE:
+        vote_flush_event.set()
+    return True
+
+def pending_vote_counts(trend_ids):
+    trend_ids = set(trend_ids)
+    counts = {}
+    with vote_lock:
+        for (trend_id, vote_type), pending in vote_pending_counts.items():
+            if trend_id in trend_ids:
+                counts.setdefault(trend_id, {})[vote_type] = pending
+    return counts
+
+def flush_votes():
+    with vote_lock:
+        batch = vote_queue[:VOTE_BATCH_SIZE]
+        del vote_queue[:VOTE_BATCH_SIZE]
+    if not batch:
+        return 0
+    inserted = {}
+    try:
+        with app.app_context():
+            for row in batch:
+                statement = sqlite_insert(Vote).values(**row).on_conflict_do_nothing(
+                    index_elements=['trend_id', 'ip_address']
+                )
+                if db.session.execute(statement).rowcount:
+                    count_key = (row['trend_id'], row['vote_type'])
+                    inserted[count_key] = inserted.get(count_key, 0) + 1
+            for (trend_id, vote_type), amount in inserted.items():
+                bump_vote_count(trend_id, vote_type, amount)
+            db.session.commit()
+    except Exception as e:
+        logger.error(f"Error flushing {len(batch)} votes: {e}", exc_info=True)
+        with app.app_context():
+            db.session.rollback()
+        with vote_lock:
+            vote_queue[:0] = batch
+        return 0
+    with vote_lock:
+        for row in batch:
+            vote_pending_keys.discard(vote_key(row['trend_id'], row['ip_address']))
+            count_key = (row['trend_id'], row['vote_type'])
+            vote_pending_counts[count_key] -= 1
+            if not vote_pending_counts[count_key]:
+                del vote_pending_counts[count_key]
+    logger.debug(f"Flushed {len(batch)} votes ({sum(inserted.values())} new)")
+    return len(batch)
+
+def vote_writer():
+    try:
+        seed_vote_filter()
+    except Exception as e:
+        logger.error(f"Error seeding vote filter: {e}", exc_info=True)
+    while True:
+        vote_flush_event.wait(VOTE_FLUSH_INTERVAL)
+        vote_flush_event.clear()
+        while flush_votes() == VOTE_BATCH_SIZE:
+            pass
+
+def start_vote_writer():
+    global vote_writer_thread
+    if vote_writer_thread is not None and vote_writer_thread.is_alive():
+        return
+    with vote_lock:
+        if vote_writer_thread is None or not vote_writer_thread.is_alive():
+            vote_writer_thread = threading.Thread(target=vote_writer, daemon=True)
+            vote_writer_thread.start()
+
+@atexit.register
+def flush_votes_on_exit():
+    while vote_queue:
+        if not flush_votes():
+            logger.error(f"Dropping {len(vote_queue)} votes that could not be written on shutdown")
+            break
+
+@contextmanager
+def file_lock(path):
+    # Serializes the workers on one host: flock on POSIX, a lock on the first
+    # byte on Windows, where fcntl does not exist
+    with open(path, 'w') as lock_file:
+        if fcntl:
+            fcntl.flock(lock_file, fcntl.LOCK_EX)
+            yield
+            return
+        while True:
+            try:
+                msvcrt.locking(lock_file.fileno(), msvcrt.LK_LOCK, 1)
+                break
+            except OSError:
+                pass  # LK_LOCK gives up after about 10 seconds
+        try:
+            yield
+        finally:
+            lock_file.seek(0)
+            msvcrt.locking(lock_file.fileno(), msvcrt.LK_UNLCK, 1)
+
+# Workers started together would otherwise race on CREATE TABLE
+with app.app_context(), file_lock(f"{db_path}.lock"):
+    event.listen(db.engine, 'connect', set_sqlite_pragmas)
+    event.listen(db.engine, 'before_cursor_execute', start_query_timer)
+    event.listen(db.engine, 'after_cursor_execute', record_query_time)
     db.create_all()
-    logger.debug(f"Trend table count: {Trend.query.count()}")
-    logger.debug(f"Vote table count: {Vote.query.count()}")
+    migrate_database()
+    if db.session.query(VoteCount.trend_id).first() is None and db.session.query(Vote.id).first() is not None:
+        rebuild_vote_counts()
+mark_startup('database')
 
 global_trends = []
 last_fetch_time = None
+# global_trends and its id index are replaced together as one snapshot, so a
+# reader that takes trend_snapshot once always sees a matching pair.
+trend_snapshot = {
+    'trends': [],
+    'by_id': {},
+    'ordered': ([], []),
+    'by_source': {},
+    'variants': [{'trends': [], 'position': {}}],
+    'api_cache': {},
+    'page_cache': {},
+    'diff': None,
+    'generation': hashlib.sha1(b'').hexdigest()[:16]
+}
+trend_generation = trend_snapshot['generation']
+
+FETCH_DEADLINE = float(os.getenv('FETCH_DEADLINE', '20'))
+source_stats = {}
 
 STOP_WORDS = {
     'the', 'and', 'for', 'with', 'from', 'this', 'that', 'are', 'was', 'were', 'has', 'have', 'had',
@@ -86,74 +811,323 @@ MOOD_KEYWORDS = {
     'Exciting': ['thrilling', 'exciting', 'epic', 'amazing', 'breakthrough']
 }
 
-try:
-    logger.debug("Loading t5-small pipeline")
-    summarizer = pipeline("summarization", model="t5-small", device="cpu")
-    logger.debug("t5-small pipeline loaded")
-except Exception as e:
-    logger.error(f"Failed to load t5-small: {e}", exc_info=True)
-    summarizer = None
+# MODEL_SERVER picks where the summarizer runs: 'spawn' starts model_server.py
+# as a child process on first use, 'external' expects one already listening
+# on MODEL_SOCKET, 'off' loads the pipeline inside this process.
+MODEL_SERVER = os.getenv('MODEL_SERVER', 'spawn')
+MODEL_SOCKET = os.getenv('MODEL_SOCKET', '/tmp/trendy-model.sock')
+MODEL_TIMEOUT = float(os.getenv('MODEL_TIMEOUT', '30'))
+MODEL_RETRY_MAX = float(os.getenv('MODEL_RETRY_MAX', '60'))
+model_server_process = None
+model_server_lock = threading.Lock()
+
+class ModelServerUnavailable(RuntimeError):
+    # Not listening yet, still loading the model or busy: worth a retry
+    pass
+
+summarizer = None
+summarizer_error = None
+summarizer_lock = threading.Lock()
+
+def get_summarizer():
+    global summarizer, summarizer_error
+    if summarizer is not None or summarizer_error or not SUMMARIES_ENABLED:
+        return summarizer
+    with summarizer_lock:
+        if summarizer is None and not summarizer_error:
+            try:
+                started = time.perf_counter()
+                from transformers import pipeline
+                logger.debug("Loading t5-small pipeline")
+                summarizer = pipeline("summarization", model="t5-small", device="cpu")
+                logger.debug(f"t5-small pipeline loaded in {time.perf_counter() - started:.2f}s")
+            except Exception as e:
+                logger.error(f"Failed to load t5-small: {e}", exc_info=True)
+                summarizer_error = str(e)
+    return summarizer
+
+# All mood keywords are matched in one pass with a single alternation,
+# longest first, anchored at word starts so 'kind' no longer fires inside
+# 'mankind' while 'memes' and 'updates' still count.
+MOOD_BY_KEYWORD = {keyword: mood for mood, keywords in MOOD_KEYWORDS.items() for keyword in keywords}
+MOOD_ORDER = {mood: index for index, mood in enumerate(MOOD_KEYWORDS)}
+MOOD_PATTERN = re.compile(r'\b(' + '|'.join(
+    re.escape(keyword) for keyword in sorted(MOOD_BY_KEYWORD, key=len, reverse=True)
+) + ')')
+WORD_PATTERN = re.compile(r'\w+')
+
+def tokenize(text):
+    return WORD_PATTERN.findall(str(text or '').lower())
+
+def keyword_counts(tokens):
+    return Counter(token for token in tokens if len(token) > 3 and token not in STOP_WORDS)
 
 def generate_mood_tags(trend):
     try:
-        title = str(trend.get("title") or "").lower()
-        description = str(trend.get("description") or "").lower()
-        text = f"{title} {description}"
-        tags = []
-        for mood, keywords in MOOD_KEYWORDS.items():
-            if any(keyword in text for keyword in keywords):
-                tags.append(mood)
-        return tags if tags else ['Trending']
+        text = f"{trend.get('title') or ''} {trend.get('description') or ''}".lower()
+        moods = {MOOD_BY_KEYWORD[match] for match in MOOD_PATTERN.findall(text)}
+        return sorted(moods, key=MOOD_ORDER.get) or ['Trending']
     except Exception as e:
         logger.error(f"Error generating mood tags: {e}", exc_info=True)
         return ['Trending']
 
-def generate_summary(trend):
+def tag_trends(trends):
+    # Runs once per fetch; the cards and fallback summaries read these
+    # instead of scanning the text again.
+    for trend in trends:
+        trend['mood_tags'] = generate_mood_tags(trend)
+        trend['keywords'] = [word for word, _ in keyword_counts(tokenize(trend.get('title'))).most_common(3)]
+    return trends
+
+def summary_input(trend):
+    title = str(trend.get("title") or "Untitled")
+    description = str(trend.get("description") or "")
+    text = f"{title}. {description}".strip()
+    text = re.sub(r'#\w+', '', text)
+    text = re.sub(r'\s+', ' ', text).strip(' .|')
+    input_length = len(text.split())
+    max_length = min(100, max(20, input_length * 2))
+    min_length = min(20, max(5, input_length // 2))
+    return text, input_length, max_length, min_length
+
+def build_summary(trend, summary_text):
+    title = str(trend.get("title") or "Untitled")
+    description = str(trend.get("description") or "")
+    source = str(trend.get("source") or "Unknown")
+    counts = keyword_counts(tokenize(f"{title} {description} {summary_text}"))
+    selected_keywords = [kw for kw, _ in counts.most_common(3)] or ['trending', source.lower()]
+    hashtags = " ".join(f"#{kw.capitalize()}" for kw in selected_keywords)
+    meta_keywords = ", ".join(selected_keywords)
+    meta_description = f"{summary_text[:160]}{'...' if len(summary_text) > 160 else ''}"
+    return {
+        "text": summary_text,
+        "hashtags": hashtags,
+        "meta_description": meta_description,
+        "meta_keywords": meta_keywords
+    }
+
+def fallback_summary(trend):
+    source = str(trend.get("source") or "Unknown")
+    title = str(trend.get("title") or "Untitled")
+    keywords = trend.get('keywords')
+    if keywords is None:
+        keywords = [word for word, _ in keyword_counts(tokenize(title)).most_common(3)]
+    keywords = keywords or ['trending', source.lower()]
+    hashtags = " ".join(f"#{kw.capitalize()}" for kw in keywords)
+    meta_keywords = ", ".join(keywords)
+    fallback_text = f"'{title}' is trending on {source}."
+    meta_description = f"{fallback_text[:160]}{'...' if len(fallback_text) > 160 else ''}"
+    return {
+        "text": fallback_text,
+        "hashtags": hashtags,
+        "meta_description": meta_description,
+        "meta_keywords": meta_keywords
+    }
+
+def model_server_listening():
+    probe = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+    try:
+        probe.connect(MODEL_SOCKET)
+        return True
+    except OSError:
+        return False
+    finally:
+        probe.close()
+
+def start_model_server():
+    # Every worker can get here at once. The file lock serializes them and
+    # model_server.py binds before loading torch, so whoever holds the lock
+    # after the first spawn finds the socket listening and starts nothing.
+    global model_server_process
+    with model_server_lock:
+        if model_server_process and model_server_process.poll() is None:
+            return
+        with file_lock(f"{MODEL_SOCKET}.lock"):
+            if model_server_listening():
+                return
+            script = os.path.join(os.path.abspath(os.path.dirname(__file__)), 'model_server.py')
+            model_server_process = subprocess.Popen([sys.executable, script, MODEL_SOCKET])
+            logger.debug(f"Started model server (pid {model_server_process.pid}) on {MODEL_SOCKET}")
+            deadline = time.monotonic() + 10
+            while time.monotonic() < deadline and model_server_process.poll() is None and not model_server_listening():
+                time.sleep(0.1)
+
+def remote_summarize(texts, max_length, min_length):
+    client = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+    client.settimeout(MODEL_TIMEOUT)
+    try:
+        client.connect(MODEL_SOCKET)
+        request_line = json.dumps({
+            'texts': texts,
+            'max_length': max_length,
+            'min_length': min_length,
+            'batch_size': SUMMARY_BATCH_SIZE
+        })
+        client.sendall((request_line + '\n').encode('utf-8'))
+        data = b''
+        while not data.endswith(b'\n'):
+            chunk = client.recv(65536)
+            if not chunk:
+                break
+            data += chunk
+    finally:
+        client.close()
+    response = json.loads(data)
+    if response.get('error') in ('loading', 'busy'):
+        raise ModelServerUnavailable(f"Model server {response['error']}")
+    if 'error' in response:
+        raise RuntimeError(f"Model server: {response['error']}")
+    return response['summaries']
+
+def summarize_texts(texts, max_length, min_length):
+    if MODEL_SERVER == 'off':
+        pipe = get_summarizer()
+        if pipe is None:
+            raise RuntimeError(f"Summarizer unavailable: {summarizer_error or 'disabled'}")
+        started = time.perf_counter()
+        results = pipe(texts, max_length=max_length, min_length=min_length, do_sample=False, truncation=True, batch_size=SUMMARY_BATCH_SIZE)
+        SUMMARIZER_SECONDS.observe(time.perf_counter() - started, 'local')
+        SUMMARIZER_TEXTS.inc(len(texts), 'local')
+        return [result['summary_text'].strip() for result in results]
     try:
-        title = str(trend.get("title") or "Untitled")
-        description = str(trend.get("description") or "")
-        source = str(trend.get("source") or "Unknown")
-        text = f"{title}. {description}".strip()
-        text = re.sub(r'#\w+', '', text)
-        text = re.sub(r'\s+', ' ', text).strip(' .|')
-        input_length = len(text.split())
-        max_length = min(100, max(20, input_length * 2))
-        min_length = min(20, max(5, input_length // 2))
-        logger.debug(f"Summary input: length={input_length}, max={max_length}, min={min_length}")
+        started = time.perf_counter()
+        summaries = remote_summarize(texts, max_length, min_length)
+        SUMMARIZER_SECONDS.observe(time.perf_counter() - started, 'remote')
+        SUMMARIZER_TEXTS.inc(len(texts), 'remote')
+        return summaries
+    except (FileNotFoundError, ConnectionRefusedError) as e:
+        if MODEL_SERVER == 'spawn':
+            start_model_server()
+        raise ModelServerUnavailable(f"Model server not listening on {MODEL_SOCKET}") from e
+
+def generate_summaries(trends):
+    # Returns one summary per trend, None where the model failed. Trends are
+    # grouped by their length limits so each group is a single batched call.
+    summaries = [None] * len(trends)
+    groups = {}
+    for index, trend in enumerate(trends):
+        text, input_length, max_length, min_length = summary_input(trend)
         if input_length < 5:
-            summary_text = f"'{title}' is trending on {source}."
+            title = str(trend.get("title") or "Untitled")
+            source = str(trend.get("source") or "Unknown")
+            summaries[index] = build_summary(trend, f"'{title}' is trending on {source}.")
         else:
-            result = summarizer(text, max_length=max_length, min_length=min_length, do_sample=False, truncation=True)
-            summary_text = result[0]['summary_text'].strip()
-        all_text = f"{title} {description} {summary_text}".lower()
-        words = re.findall(r'\w+', all_text)
-        keywords = [word for word in words if len(word) > 3 and word not in STOP_WORDS]
-        keyword_counts = Counter(keywords).most_common(3)
-        selected_keywords = [kw for kw, _ in keyword_counts] or ['trending', source.lower()]
-        hashtags = " ".join(f"#{kw.capitalize()}" for kw in selected_keywords)
-        meta_keywords = ", ".join(selected_keywords)
-        meta_description = f"{summary_text[:160]}{'...' if len(summary_text) > 160 else ''}"
-        return {
-            "text": summary_text,
-            "hashtags": hashtags,
-            "meta_description": meta_description,
-            "meta_keywords": meta_keywords
-        }
-    except Exception as e:
-        logger.error(f"Error generating summary: {e}", exc_info=True)
-        source = str(trend.get("source") or "Unknown")
-        title = str(trend.get("title") or "Untitled")
-        keywords = [kw for kw in title.lower().split() if len(kw) > 3 and kw not in STOP_WORDS][:3] or ['trending', source.lower()]
-        hashtags = " ".join(f"#{kw.capitalize()}" for kw in keywords)
-        meta_keywords = ", ".join(keywords)
-        fallback_summary = f"'{title}' is trending on {source}."
-        meta_description = f"{fallback_summary[:160]}{'...' if len(fallback_summary) > 160 else ''}"
-        return {
-            "text": fallback_summary,
-            "hashtags": hashtags,
-            "meta_description": meta_description,
-            "meta_keywords": meta_keywords
-        }
+            groups.setdefault((max_length, min_length), []).append((index, text))
+    for (max_length, min_length), batch in groups.items():
+        try:
+            results = summarize_texts([text for _, text in batch], max_length, min_length)
+            for (index, _), summary_text in zip(batch, results):
+                summaries[index] = build_summary(trends[index], summary_text)
+        except ModelServerUnavailable:
+            raise
+        except Exception as e:
+            logger.error(f"Error generating summaries for {len(batch)} trends: {e}", exc_info=True)
+    return summaries
+
+# ---------------------------- SUMMARY WORKER ---------------------------- #
+
+SUMMARY_BATCH_SIZE = int(os.getenv('SUMMARY_BATCH_SIZE', '8'))
+summary_queue = queue.Queue()
+summary_pending = set()
+summary_lock = threading.Lock()
+summary_thread = None
+
+def summary_hash(trend):
+    content = f"{trend.get('title') or ''}\n{trend.get('description') or ''}"
+    return hashlib.md5(content.encode('utf-8')).hexdigest()
+
+def get_stored_summary(trend):
+    row = db.session.get(TrendSummary, trend['id'])
+    if not row or row.content_hash != summary_hash(trend):
+        return None
+    return {
+        "text": row.text,
+        "hashtags": row.hashtags,
+        "meta_description": row.meta_description,
+        "meta_keywords": row.meta_keywords
+    }
+
+def stored_summary_hashes(trend_ids):
+    hashes = {}
+    trend_ids = list(trend_ids)
+    for i in range(0, len(trend_ids), 500):
+        rows = db.session.query(TrendSummary.trend_id, TrendSummary.content_hash).filter(
+            TrendSummary.trend_id.in_(trend_ids[i:i + 500])
+        ).all()
+        hashes.update({row.trend_id: row.content_hash for row in rows})
+    return hashes
+
+def enqueue_summaries(trends):
+    if not trends or not SUMMARIES_ENABLED:
+        return 0
+    stored = stored_summary_hashes(t['id'] for t in trends)
+    queued = 0
+    with summary_lock:
+        for trend in trends:
+            if trend['id'] in summary_pending or stored.get(trend['id']) == summary_hash(trend):
+                continue
+            summary_pending.add(trend['id'])
+            summary_queue.put(dict(trend))
+            queued += 1
+    if queued:
+        logger.debug(f"Queued {queued} trends for summarization")
+        start_summary_worker()
+    return queued
+
+def start_summary_worker():
+    # The model server is spawned by the worker thread on its first attempt,
+    # never here, since enqueue_summaries also runs on the request path
+    global summary_thread
+    with summary_lock:
+        if summary_thread is None or not summary_thread.is_alive():
+            summary_thread = threading.Thread(target=summary_worker, daemon=True)
+            summary_thread.start()
+
+def summary_worker():
+    # While the model server is starting or busy, batches go back on the
+    # queue (still marked pending) and the worker backs off, up to
+    # MODEL_RETRY_MAX seconds, instead of dropping them
+    backoff = 1
+    while True:
+        batch = [summary_queue.get()]
+        while len(batch) < SUMMARY_BATCH_SIZE:
+            try:
+                batch.append(summary_queue.get_nowait())
+            except queue.Empty:
+                break
+        try:
+            summaries = generate_summaries(batch)
+        except ModelServerUnavailable as e:
+            logger.info(f"{e}, retrying {len(batch)} trends in {backoff}s")
+            for trend in batch:
+                summary_queue.put(trend)
+            time.sleep(backoff)
+            backoff = min(backoff * 2, MODEL_RETRY_MAX)
+            continue
+        backoff = 1
+        try:
+            with app.app_context():
+                for trend, summary in zip(batch, summaries):
+                    if not summary:
+                        continue
+                    db.session.merge(TrendSummary(
+                        trend_id=trend['id'],
+                        content_hash=summary_hash(trend),
+                        text=summary['text'],
+                        hashtags=summary['hashtags'],
+                        meta_description=summary['meta_description'],
+                        meta_keywords=summary['meta_keywords'],
+                        timestamp=datetime.now(timezone.utc)
+                    ))
+                db.session.commit()
+            logger.debug(f"Stored summaries for {sum(1 for s in summaries if s)}/{len(batch)} trends")
+        except Exception as e:
+            logger.error(f"Summary worker error: {e}", exc_info=True)
+            with app.app_context():
+                db.session.rollback()
+        finally:
+            with summary_lock:
+                summary_pending.difference_update(trend['id'] for trend in batch)
 
 def generate_stable_id(trend):
     title = str(trend.get("title", "")).strip().lower()
@@ -166,19 +1140,31 @@ def generate_stable_id(trend):
         if not clean_link.startswith(('http://', 'https://')):
             clean_link = f"https://{clean_link.lstrip('/')}"
     except ValueError as e:
-        logger.warning(f"Invalid URL in generate_stable_id: {link}, error: {e}")
+        hot_logger.warning("Invalid URL in generate_stable_id: %s, error: %s", link, e)
         clean_link = ""
     key = (title + clean_link).encode("utf-8")
     trend_id = hashlib.md5(key).hexdigest()
-    logger.debug(f"ID for title: '{title}', link: '{clean_link}' -> {trend_id}")
+    hot_logger.debug("ID for title: %r, link: %r -> %s", title, clean_link, trend_id)
     return trend_id
 
+def parse_timestamp(timestamp):
+    if isinstance(timestamp, str):
+        timestamp = datetime.fromisoformat(timestamp.replace('Z', '+00:00'))
+    if timestamp.tzinfo is None:
+        return timestamp.replace(tzinfo=timezone.utc)
+    return timestamp.astimezone(timezone.utc)
+
+def utc_timestamp(timestamp):
+    # Cards carry the time itself and index.js turns it into "n minutes ago";
+    # text rendered here would be frozen in the cached page
+    try:
+        return parse_timestamp(timestamp).isoformat(timespec='seconds')
+    except (TypeError, ValueError, AttributeError):
+        return ''
+
 def time_ago(timestamp):
     try:
-        if isinstance(timestamp, str):
-            past = datetime.fromisoformat(timestamp.replace('Z', '+00:00')).replace(tzinfo=timezone.utc)
-        else:
-            past = timestamp.replace(tzinfo=timezone.utc)
+        past = parse_timestamp(timestamp)
         now = datetime.now(timezone.utc)
         diff = now - past
         seconds = diff.total_seconds()
@@ -194,426 +1180,153 @@ def time_ago(timestamp):
         logger.error(f"Error in time_ago: {e}", exc_info=True)
         return "Unknown time"
 
-app.jinja_env.globals.update(time_ago=time_ago, current_year=datetime.now().year)
+app.jinja_env.globals.update(time_ago=time_ago, utc_timestamp=utc_timestamp, current_year=datetime.now().year)
 
 def get_trend_of_the_day(trends):
     if not trends:
         return None
     today = date.today().isoformat()
-    random.seed(today)
-    return random.choice(trends)
+    return random.Random(today).choice(trends)
 
 def cleanup_old_trends():
     try:
         threshold = datetime.now(timezone.utc) - timedelta(days=7)
         deleted = Trend.query.filter(Trend.timestamp < threshold).delete()
+        orphaned = TrendSummary.query.filter(
+            ~TrendSummary.trend_id.in_(db.session.query(Trend.id))
+        ).delete(synchronize_session=False)
+        messages = ChatMessage.query.filter(ChatMessage.timestamp < threshold).delete()
         db.session.commit()
-        logger.debug(f"Cleaned {deleted} old trends")
+        logger.debug(f"Cleaned {deleted} old trends, {orphaned} summaries, {messages} chat messages")
     except Exception as e:
         logger.error(f"Error cleaning trends: {e}", exc_info=True)
         db.session.rollback()
 
-def get_hacker_news():
-    url = 'https://news.ycombinator.com/'
-    headers = {'User-Agent': 'Mozilla/5.0 (Windows NT 10.0; Win64; x64) Chrome/112.0.0.0'}
-    try:
-        response = requests.get(url, headers=headers, timeout=10)
-        response.raise_for_status()
-        soup = BeautifulSoup(response.text, 'html.parser')
-        items = soup.select('.athing')
-        results = []
-        for item in items[:25]:
-            title_tag = item.select_one('.titleline')
-            if not title_tag:
-                continue
-            title = title_tag.text.strip()
-            link = title_tag.find('a')['href']
-            if link.startswith('item?id='):
-                link = urljoin(url, link)
-            elif not link.startswith(('http://', 'https://')):
-                link = 'https://' + link.lstrip('/')
-            trend = {
-                'title': title,
-                'description': '',
-                'link': link,
-                'source': 'From Hacker News',
-                'source_class': 'HackerTrending',
-                'image': '/static/images/default_trendy.png',
-                'video': None
+# ---------------------------- HTTP SESSION ---------------------------- #
+
+HTTP_POOL_SIZE = int(os.getenv('HTTP_POOL_SIZE', '16'))
+http_session = requests.Session()
+http_adapter = HTTPAdapter(pool_connections=HTTP_POOL_SIZE, pool_maxsize=HTTP_POOL_SIZE)
+http_session.mount('https://', http_adapter)
+http_session.mount('http://', http_adapter)
+http_cache = {}
+http_cache_lock = threading.Lock()
+
+def http_cache_key(url, params=None):
+    if not params:
+        return url
+    return url + '?' + '&'.join(f"{k}={v}" for k, v in sorted(params.items()))
+
+def http_get(url, headers=None, params=None, timeout=10):
+    key = http_cache_key(url, params)
+    request_headers = dict(headers or {})
+    with http_cache_lock:
+        entry = http_cache.get(key)
+    if entry:
+        if entry.get('etag'):
+            request_headers['If-None-Match'] = entry['etag']
+        if entry.get('last_modified'):
+            request_headers['If-Modified-Since'] = entry['last_modified']
+    response = http_session.get(url, headers=request_headers, params=params, timeout=timeout)
+    response.cache_key = key
+    if response.status_code == 304 and not entry:
+        # Nothing to reuse, so ask again without the validators
+        response = http_session.get(url, headers=headers, params=params, timeout=timeout)
+        response.cache_key = key
+    return response
+
+def cached_results(response):
+    with http_cache_lock:
+        entry = http_cache.get(response.cache_key)
+    results = [dict(trend) for trend in entry['results']] if entry else []
+    logger.debug(f"Not modified: {response.cache_key}, reusing {len(results)} cached trends")
+    return results
+
+def remember_results(response, results):
+    etag = response.headers.get('ETag')
+    last_modified = response.headers.get('Last-Modified')
+    if (etag or last_modified) and results:
+        with http_cache_lock:
+            http_cache[response.cache_key] = {
+                'etag': etag,
+                'last_modified': last_modified,
+                'results': [dict(trend) for trend in results]
             }
-            trend['id'] = generate_stable_id(trend)
-            results.append(trend)
-        logger.debug(f"Hacker News: Fetched {len(results)} trends")
-        return results
-    except Exception as e:
-        logger.error(f"Error fetching Hacker News trends: {e}", exc_info=True)
-        return []
-
-def get_github_trending():
-    url = 'https://github.com/trending'
-    headers = {'User-Agent': 'Mozilla/5.0 (Windows NT 10.0; Win64; x64) Chrome/112.0.0.0'}
-    try:
-        response = requests.get(url, headers=headers, timeout=10)
-        response.raise_for_status()
-        soup = BeautifulSoup(response.text, 'html.parser')
-        items = soup.select('article.Box-row')
-        results = []
-        for item in items[:25]:
-            repo = item.select_one('h2').text.strip().replace('\n', '').replace(' ', '')
-            link = 'https://github.com' + item.select_one('h2 a')['href']
-            description_tag = item.select_one('p')
-            description = description_tag.text.strip() if description_tag else ''
-            title = f"{repo}"
-            trend = {
-                'title': title,
-                'description': description,
-                'link': link,
-                'source': 'From GitHub',
-                'source_class': 'GithubTrending',
-                'image': '/static/images/default_trendy.png',
-                'video': None,
-            }
-            trend['id'] = generate_stable_id(trend)
-            results.append(trend)
-        logger.debug(f"GitHub: Fetched {len(results)} trends")
-        return results
-    except Exception as e:
-        logger.error(f"Error fetching GitHub trends: {e}", exc_info=True)
-        return []
+    return results
+
+def parse_reddit(json_data, limit=25):
+    results = []
+    for item in json_data.get('data', {}).get('children', [])[:limit]:
+        data = item['data']
+        reddit_url = 'https://reddit.com' + data.get('permalink', '')
+        title = data.get('title', 'No title')
+        description = data.get('selftext', '')
+        video_url = None
+        image_url = None
+        media = data.get('secure_media') or data.get('media')
+        if media and 'reddit_video' in media:
+            video_url = media['reddit_video'].get('fallback_url')
+        if not video_url and data.get('preview'):
+            reddit_video_preview = data['preview'].get('reddit_video_preview')
+            if reddit_video_preview:
+                video_url = reddit_video_preview.get('fallback_url')
+        if not video_url and media and media.get('type', '').startswith('gif'):
+            reddit_video = media.get('reddit_video')
+            if reddit_video:
+                video_url = reddit_video.get('fallback_url')
+        if not video_url and data.get('thumbnail', '').startswith('http'):
+            image_url = data['thumbnail']
+        if not video_url and not image_url and data.get('preview'):
+            images = data['preview'].get('images')
+            if images and len(images) > 0:
+                image_url = images[0].get('source', {}).get('url')
+                if image_url:
+                    image_url = image_url.replace('&amp;', '&')
+        trend = {
+            'title': title,
+            'description': description,
+            'link': reddit_url,
+            'source': 'From Reddit',
+            'source_class': 'RedditTrending',
+            'image': image_url if image_url else '/static/images/default_trendy.png',
+            'video': video_url,
+        }
+        trend['id'] = generate_stable_id(trend)
+        results.append(trend)
+    return results
 
 def get_reddit_top():
     headers = {'User-agent': 'TrendyScraper 1.0'}
     url = 'https://www.reddit.com/r/popular/top.json?limit=25'
-    try:
-        response = requests.get(url, headers=headers, timeout=10)
-        response.raise_for_status()
-        json_data = response.json()
-        results = []
-        for item in json_data.get('data', {}).get('children', [])[:25]:
-            data = item['data']
-            reddit_url = 'https://reddit.com' + data.get('permalink', '')
-            title = data.get('title', 'No title')
-            description = data.get('selftext', '')
-            video_url = None
-            image_url = None
-            media = data.get('secure_media') or data.get('media')
-            if media and 'reddit_video' in media:
-                video_url = media['reddit_video'].get('fallback_url')
-            if not video_url and data.get('preview'):
-                reddit_video_preview = data['preview'].get('reddit_video_preview')
-                if reddit_video_preview:
-                    video_url = reddit_video_preview.get('fallback_url')
-            if not video_url and media and media.get('type', '').startswith('gif'):
-                reddit_video = media.get('reddit_video')
-                if reddit_video:
-                    video_url = reddit_video.get('fallback_url')
-            if not video_url and data.get('thumbnail', '').startswith('http'):
-                image_url = data['thumbnail']
-            if not video_url and not image_url and data.get('preview'):
-                images = data['preview'].get('images')
-                if images and len(images) > 0:
-                    image_url = images[0].get('source', {}).get('url')
-                    if image_url:
-                        image_url = image_url.replace('&amp;', '&')
-            trend = {
-                'title': title,
-                'description': description,
-                'link': reddit_url,
-                'source': 'From Reddit',
-                'source_class': 'RedditTrending',
-                'image': image_url if image_url else '/static/images/default_trendy.png',
-                'video': video_url,
-            }
-            trend['id'] = generate_stable_id(trend)
-            results.append(trend)
-        logger.debug(f"Reddit: Fetched {len(results)} trends")
-        return results
-    except Exception as e:
-        logger.error(f"Error fetching Reddit trends: {e}", exc_info=True)
-        return []
-
-def get_techcrunch():
-    url = 'https://techcrunch.com/'
-    headers = {'User-Agent': 'Mozilla/5.0 (Windows NT 10.0; Win64; x64) Chrome/112.0.0.0'}
-    try:
-        response = requests.get(url, headers=headers, timeout=10)
-        response.raise_for_status()
-        soup = BeautifulSoup(response.text, 'html.parser')
-        items = soup.select('a.post-block__title__link')
-        results = []
-        for item in items[:25]:
-            title = item.get_text(strip=True)
-            link = item['href']
-            parent = item.find_parent('div', class_='post-block')
-            description_tag = parent.select_one('.post-block__content') if parent else None
-            description = description_tag.get_text(strip=True) if description_tag else ''
-            image_tag = parent.select_one('img') if parent else None
-            image = image_tag['src'] if image_tag and image_tag.has_attr('src') else '/static/images/default_trendy.svg'
-            trend = {
-                'title': title,
-                'description': description,
-                'link': link,
-                'source': 'From TechCrunch',
-                'source_class': 'TechcrunchTrending',
-                'image': image,
-                'video': None
-            }
-            trend['id'] = generate_stable_id(trend)
-            results.append(trend)
-        logger.debug(f"TechCrunch: Fetched {len(results)} trends")
-        return results
-    except Exception as e:
-        logger.error(f"Error fetching TechCrunch trends: {e}", exc_info=True)
-        return []
-
-def get_stackoverflow_trending():
-    url = 'https://stackoverflow.com/questions?tab=Hot'
-    headers = {'User-Agent': 'Mozilla/5.0 (Windows NT 10.0; Win64; x64) Chrome/112.0.0.0'}
-    try:
-        response = requests.get(url, headers=headers, timeout=10)
-        response.raise_for_status()
-        soup = BeautifulSoup(response.text, 'html.parser')
-        items = soup.select('.s-post-summary')
-        results = []
-        for item in items[:25]:
-            title_tag = item.select_one('.s-link')
-            if not title_tag:
-                continue
-            title = title_tag.text.strip()
-            link = urljoin('https://stackoverflow.com', title_tag['href'])
-            excerpt_tag = item.select_one('.s-post-summary--content-excerpt')
-            description = excerpt_tag.text.strip() if excerpt_tag else ''
-            trend = {
-                'title': title,
-                'description': description,
-                'link': link,
-                'source': 'From Stack Overflow',
-                'source_class': 'StackoverflowTrending',
-                'image': '/static/images/default_trendy.png',
-                'video': None
-            }
-            trend['id'] = generate_stable_id(trend)
-            results.append(trend)
-        logger.debug(f"Stack Overflow: Fetched {len(results)} trends")
-        return results
-    except Exception as e:
-        logger.error(f"Error fetching Stack Overflow trends: {e}", exc_info=True)
-        return []
-
-def get_devto_latest():
-    url = 'https://dev.to/'
-    headers = {
-        'User-Agent': 'Mozilla/5.0 (Windows NT 10.0; Win64; x64) Chrome/112.0.0.0',
-        'Accept': 'text/html,application/xhtml+xml,application/xml;q=0.9,image/webp,*/*;q=0.8',
-        'Accept-Language': 'en-US,en;q=0.5'
-    }
-    try:
-        response = requests.get(url, headers=headers, timeout=10)
-        response.raise_for_status()
-        soup = BeautifulSoup(response.text, 'html.parser')
-        items = soup.select('div.crayons-story')
-        results = []
-        for item in items[:25]:
-            title_tag = item.select_one('h2.crayons-story__title a')
-            if not title_tag:
-                continue
-            title = title_tag.text.strip()
-            link = urljoin(url, title_tag['href'])
-            description_tag = item.select_one('p.crayons-story__snippet')
-            description = description_tag.text.strip() if description_tag else ''
-            trend = {
-                'title': title,
-                'description': description,
-                'link': link,
-                'source': 'From Dev.to',
-                'source_class': 'DevtoTrending',
-                'image': '/static/images/default_trendy.png',
-                'video': None
-            }
-            trend['id'] = generate_stable_id(trend)
-            results.append(trend)
-        logger.debug(f"Dev.to: Fetched {len(results)} trends")
-        return results
-    except Exception as e:
-        logger.error(f"Error fetching Dev.to trends: {e}", exc_info=True)
-        return []
-
-def get_medium_technology():
-    url = 'https://medium.com/tag/technology'
-    headers = {'User-Agent': 'Mozilla/5.0 (Windows NT 10.0; Win64; x64) Chrome/112.0.0.0'}
-    try:
-        response = requests.get(url, headers=headers, timeout=10)
-        response.raise_for_status()
-        soup = BeautifulSoup(response.text, 'html.parser')
-        items = soup.select('article')
-        results = []
-        for item in items[:25]:
-            title_tag = item.select_one('h2')
-            if not title_tag:
-                continue
-            title = title_tag.text.strip()
-            link_tag = item.find('a', href=True)
-            link = urljoin('https://medium.com', link_tag['href'].split('?')[0]) if link_tag else url
-            description_tag = item.select_one('div[aria-hidden="true"] p')
-            description = description_tag.text.strip() if description_tag else ''
-            trend = {
-                'title': title,
-                'description': description,
-                'link': link,
-                'source': 'From Medium Technology',
-                'source_class': 'MediumtechTrending',
-                'image': '/static/images/default_trendy.png',
-                'video': None
-            }
-            trend['id'] = generate_stable_id(trend)
-            results.append(trend)
-        logger.debug(f"Medium: Fetched {len(results)} trends")
-        return results
-    except Exception as e:
-        logger.error(f"Error fetching Medium trends: {e}", exc_info=True)
-        return []
-
-def get_lobsters():
-    url = 'https://lobste.rs/'
-    headers = {'User-Agent': 'Mozilla/5.0 (Windows NT 10.0; Win64; x64) Chrome/112.0.0.0'}
-    try:
-        response = requests.get(url, headers=headers, timeout=10)
-        response.raise_for_status()
-        soup = BeautifulSoup(response.text, 'html.parser')
-        items = soup.select('.story .link a')
-        results = []
-        for item in items[:25]:
-            title = item.text.strip()
-            link = item['href']
-            if not link.startswith(('http://', 'https://')):
-                link = urljoin(url, link)
-            description = ''
-            trend = {
-                'title': title,
-                'description': description,
-                'link': link,
-                'source': 'From Lobsters',
-                'source_class': 'LobstersTrending',
-                'image': '/static/images/default_trendy.png',
-                'video': None
-            }
-            trend['id'] = generate_stable_id(trend)
-            results.append(trend)
-        logger.debug(f"Lobsters: Fetched {len(results)} trends")
-        return results
-    except Exception as e:
-        logger.error(f"Error fetching Lobsters trends: {e}", exc_info=True)
-        return []
-
-def get_slashdot():
-    url = 'https://slashdot.org/'
-    headers = {'User-Agent': 'Mozilla/5.0 (Windows NT 10.0; Win64; x64) Chrome/112.0.0.0'}
-    try:
-        response = requests.get(url, headers=headers, timeout=10)
-        response.raise_for_status()
-        soup = BeautifulSoup(response.text, 'html.parser')
-        items = soup.select('.story')
-        results = []
-        for item in items[:25]:
-            title_tag = item.select_one('.story-title a')
-            if not title_tag:
-                continue
-            title = title_tag.text.strip()
-            link = title_tag['href']
-            if not link.startswith(('http://', 'https://')):
-                link = urljoin('https://slashdot.org', link)
-            desc_tag = item.select_one('.p')
-            description = desc_tag.text.strip() if desc_tag else ''
-            trend = {
-                'title': title,
-                'description': description,
-                'link': link,
-                'source': 'From Slashdot',
-                'source_class': 'SlashdotTrending',
-                'image': '/static/images/default_trendy.png',
-                'video': None
-            }
-            trend['id'] = generate_stable_id(trend)
-            results.append(trend)
-        logger.debug(f"Slashdot: Fetched {len(results)} trends")
-        return results
-    except Exception as e:
-        logger.error(f"Error fetching Slashdot trends: {e}", exc_info=True)
-        return []
-
-def get_digg_popular():
-    url = 'https://digg.com/'
-    headers = {'User-Agent': 'Mozilla/5.0 (Windows NT 10.0; Win64; x64) Chrome/112.0.0.0'}
-    try:
-        response = requests.get(url, headers=headers, timeout=10)
-        response.raise_for_status()
-        soup = BeautifulSoup(response.text, 'html.parser')
-        items = soup.select('article.story-item')
-        results = []
-        for item in items[:25]:
-            title_tag = item.select_one('h2')
-            if not title_tag:
-                continue
-            title = title_tag.text.strip()
-            link_tag = item.select_one('a.story-link')
-            link = link_tag['href'] if link_tag else 'https://digg.com'
-            description_tag = item.select_one('.story-content p')
-            description = description_tag.text.strip() if description_tag else ''
-            image_tag = item.select_one('img')
-            image = image_tag['src'] if image_tag and image_tag.has_attr('src') else '/static/images/default_trendy.svg'
-            trend = {
-                'title': title,
-                'description': description,
-                'link': link,
-                'source': 'From Digg',
-                'source_class': 'DiggTrending',
-                'image': image,
-                'video': None
-            }
-            trend['id'] = generate_stable_id(trend)
-            results.append(trend)
-        logger.debug(f"Digg: Fetched {len(results)} trends")
-        return results
-    except Exception as e:
-        logger.error(f"Error fetching Digg trends: {e}", exc_info=True)
-        return []
-
-def get_bbc_trending():
-    url = 'https://www.bbc.com/news'
-    headers = {'User-Agent': 'Mozilla/5.0 (Windows NT 10.0; Win64; x64) Chrome/112.0.0.0'}
-    try:
-        response = requests.get(url, headers=headers, timeout=10)
-        response.raise_for_status()
-        soup = BeautifulSoup(response.text, 'html.parser')
-        items = soup.select('div.gs-c-promo')
-        results = []
-        for item in items[:25]:
-            title_tag = item.select_one('h3')
-            if not title_tag:
-                continue
-            title = title_tag.text.strip()
-            link_tag = item.select_one('a.gs-c-promo-heading')
-            link = urljoin(url, link_tag['href']) if link_tag else url
-            desc_tag = item.select_one('.gs-c-promo-summary')
-            description = desc_tag.text.strip() if desc_tag else ''
-            image_tag = item.select_one('img')
-            image = image_tag['src'] if image_tag and image_tag.has_attr('src') else '/static/images/default_trendy.svg'
-            trend = {
-                'title': title,
-                'description': description,
-                'link': link,
-                'source': 'From BBC',
-                'source_class': 'BBCTrending',
-                'image': image,
-                'video': None
-            }
-            trend['id'] = generate_stable_id(trend)
-            results.append(trend)
-        logger.debug(f"BBC: Fetched {len(results)} trends")
-        return results
-    except Exception as e:
-        logger.error(f"Error fetching BBC trends: {e}", exc_info=True)
-        return []
+    response = http_get(url, headers=headers, timeout=10)
+    if response.status_code == 304:
+        return cached_results(response)
+    response.raise_for_status()
+    results = parse_reddit(response.json())
+    logger.debug(f"Reddit: Fetched {len(results)} trends")
+    return remember_results(response, results)
+
+def parse_youtube(data, limit=25):
+    results = []
+    for item in data.get('items', [])[:limit]:
+        snippet = item['snippet']
+        video_id = item['id']
+        title = snippet.get('title', '')
+        description = snippet.get('description', '')
+        link = f'https://www.youtube.com/watch?v={video_id}'
+        image = snippet.get('thumbnails', {}).get('medium', {}).get('url', '/static/images/default_trendy.png')
+        trend = {
+            'title': title,
+            'description': description,
+            'link': link,
+            'source': 'From YouTube',
+            'source_class': 'YouTubeTrending',
+            'image': image,
+            'video': None
+        }
+        trend['id'] = generate_stable_id(trend)
+        results.append(trend)
+    return results
 
 def get_youtube_trending(YOUTUBE_API_KEY):
     if not YOUTUBE_API_KEY:
@@ -628,168 +1341,17 @@ def get_youtube_trending(YOUTUBE_API_KEY):
         'key': YOUTUBE_API_KEY
     }
     try:
-        response = requests.get(url, params=params, timeout=10)
+        response = http_get(url, params=params, timeout=10)
+        if response.status_code == 304:
+            return cached_results(response)
         response.raise_for_status()
-        data = response.json()
-        results = []
-        for item in data.get('items', [])[:25]:
-            snippet = item['snippet']
-            video_id = item['id']
-            title = snippet.get('title', '')
-            description = snippet.get('description', '')
-            link = f'https://www.youtube.com/watch?v={video_id}'
-            image = snippet.get('thumbnails', {}).get('medium', {}).get('url', '/static/images/default_trendy.png')
-            trend = {
-                'title': title,
-                'description': description,
-                'link': link,
-                'source': 'From YouTube',
-                'source_class': 'YouTubeTrending',
-                'image': image,
-                'video': None
-            }
-            trend['id'] = generate_stable_id(trend)
-            results.append(trend)
+        results = parse_youtube(response.json())
         logger.debug(f"YouTube: Fetched {len(results)} trends")
-        return results
+        return remember_results(response, results)
     except Exception as e:
         logger.error(f"Error fetching YouTube trends: {e}", exc_info=True)
         return []
 
-def get_ars_technica():
-    url = 'https://arstechnica.com/'
-    headers = {'User-Agent': 'Mozilla/5.0 (Windows NT 10.0; Win64; x64) Chrome/112.0.0.0'}
-    try:
-        response = requests.get(url, headers=headers, timeout=10)
-        response.raise_for_status()
-        soup = BeautifulSoup(response.text, 'html.parser')
-        items = soup.select('article.tease')
-        results = []
-        for item in items[:25]:
-            title_tag = item.select_one('h2 a')
-            if not title_tag:
-                continue
-            title = title_tag.text.strip()
-            link = urljoin(url, title_tag['href'])
-            desc_tag = item.select_one('p.excerpt')
-            description = desc_tag.text.strip() if desc_tag else ''
-            image_tag = item.select_one('img')
-            image = image_tag['src'] if image_tag and image_tag.has_attr('src') else '/static/images/default_trendy.png'
-            trend = {
-                'title': title,
-                'description': description,
-                'link': link,
-                'source': 'From Ars Technica',
-                'source_class': 'ArsTechnicaTrending',
-                'image': image,
-                'video': None
-            }
-            trend['id'] = generate_stable_id(trend)
-            results.append(trend)
-        logger.debug(f"Ars Technica: Fetched {len(results)} trends")
-        return results
-    except Exception as e:
-        logger.error(f"Error fetching Ars Technica trends: {e}", exc_info=True)
-        return []
-
-def get_wired():
-    url = 'https://www.wired.com/feed/rss'
-    headers = {'User-Agent': 'Mozilla/5.0 (Windows NT 10.0; Win64; x64) Chrome/112.0.0.0'}
-    try:
-        response = requests.get(url, headers=headers, timeout=10)
-        response.raise_for_status()
-        soup = BeautifulSoup(response.content, 'xml')
-        items = soup.find_all('item')
-        results = []
-        for item in items[:25]:
-            title = item.title.text.strip()
-            link = item.link.text.strip()
-            description = item.description.text.strip() if item.description else ''
-            trend = {
-                'title': title,
-                'description': description,
-                'link': link,
-                'source': 'From Wired',
-                'source_class': 'WiredTrending',
-                'image': '/static/images/default_trendy.png',
-                'video': None
-            }
-            trend['id'] = generate_stable_id(trend)
-            results.append(trend)
-        logger.debug(f"Wired: Fetched {len(results)} trends")
-        return results
-    except Exception as e:
-        logger.error(f"Error fetching Wired trends: {e}", exc_info=True)
-        return []
-
-def get_goodreads_trending():
-    url = 'https://www.goodreads.com/book/popular_by_date/2025'
-    headers = {'User-Agent': 'Mozilla/5.0 (Windows NT 10.0; Win64; x64) Chrome/112.0.0.0'}
-    try:
-        response = requests.get(url, headers=headers, timeout=10)
-        response.raise_for_status()
-        soup = BeautifulSoup(response.text, 'html.parser')
-        book_sections = soup.select('div.tableList tr')
-        results = []
-        for row in book_sections[:25]:
-            link_tag = row.select_one('a.bookTitle')
-            image_tag = row.select_one('img.bookCover')
-            if not link_tag or not image_tag:
-                continue
-            title = link_tag.text.strip()
-            link = 'https://www.goodreads.com' + link_tag['href']
-            image = image_tag['src']
-            trend = {
-                'title': title,
-                'description': '',
-                'image': image,
-                'link': link,
-                'source': 'From Goodreads',
-                'source_class': 'GoodreadsTrending',
-                'video': None
-            }
-            trend['id'] = generate_stable_id(trend)
-            results.append(trend)
-        logger.debug(f"Goodreads: Fetched {len(results)} trends")
-        return results
-    except Exception as e:
-        logger.error(f"Error fetching Goodreads trends: {e}", exc_info=True)
-        return []
-
-def get_steam_charts():
-    url = 'https://steamcharts.com/top'
-    headers = {'User-Agent': 'Mozilla/5.0 (Windows NT 10.0; Win64; x64) Chrome/112.0.0.0'}
-    try:
-        response = requests.get(url, headers=headers, timeout=10)
-        response.raise_for_status()
-        soup = BeautifulSoup(response.text, 'html.parser')
-        rows = soup.select('table.common-table tbody tr')
-        results = []
-        for row in rows[:25]:
-            name_tag = row.select_one('td.game-name > a')
-            if not name_tag:
-                continue
-            title = name_tag.text.strip()
-            link = 'https://steamcharts.com' + name_tag['href']
-            app_id = name_tag['href'].split('/')[-1]
-            image = f'https://cdn.cloudflare.steamstatic.com/steam/apps/{app_id}/header.jpg'
-            trend = {
-                'title': title,
-                'description': '',
-                'image': image,
-                'link': link,
-                'source': 'From Steam Charts',
-                'source_class': 'SteamChartsTrending',
-                'video': None
-            }
-            trend['id'] = generate_stable_id(trend)
-            results.append(trend)
-        logger.debug(f"Steam Charts: Fetched {len(results)} trends")
-        return results
-    except Exception as e:
-        logger.error(f"Error fetching Steam Charts trends: {e}", exc_info=True)
-        return []
-
 def get_spotify_charts(client_id, client_secret):
     if not client_id or not client_secret:
         logger.warning("Spotify Client ID or Client Secret not provided, skipping Spotify trends")
@@ -825,235 +1387,1016 @@ def get_spotify_charts(client_id, client_secret):
         logger.error(f"Error fetching Spotify Charts trends: {e}", exc_info=True)
         return []
 
-def get_billboard_trending():
-    url = 'https://www.billboard.com/charts/hot-100'
-    headers = {'User-Agent': 'Mozilla/5.0 (Windows NT 10.0; Win64; x64) Chrome/112.0.0.0'}
+# ---------------------------- ASSETS ---------------------------- #
+
+# Files under static/ are copied to ASSET_DIR with a content hash in the name
+# (css/index.css -> css/index.1a2b3c4d5e.css), with .gz and .br copies of the
+# text ones, at startup or with `flask build-assets`. A hashed file never
+# changes, so /assets/ can send it as immutable. asset_url needs no request
+# context, which the home variants rendered in the background rely on.
+ASSET_DIR = os.getenv('ASSET_DIR', os.path.join(app.root_path, 'build', 'assets'))
+ASSET_COMPRESSIBLE = ('.css', '.js', '.svg', '.json', '.txt')
+ASSET_MAX_AGE = 365 * 86400
+asset_manifest = {}
+
+def write_asset(path, data):
+    # Every worker builds at startup; each writes its own temp file and the
+    # rename is atomic, so a reader sees either nothing or the whole file
+    if os.path.exists(path):
+        return
+    fd, tmp = tempfile.mkstemp(dir=os.path.dirname(path), prefix='.tmp-')
     try:
-        response = requests.get(url, headers=headers, timeout=10)
-        response.raise_for_status()
-        soup = BeautifulSoup(response.text, 'html.parser')
-        items = soup.select('li.o-chart-results-list__item h3')
-        results = []
-        for i, h3 in enumerate(items[:25]):
-            title = h3.get_text(strip=True)
-            artist_tag = h3.find_next('span')
-            artist = artist_tag.get_text(strip=True) if artist_tag else 'Unknown Artist'
-            trend = {
-                'title': f'{title} — {artist}',
-                'description': f'#{i+1} on Billboard Hot 100',
-                'link': url,
-                'source': 'From Billboard',
-                'source_class': 'BillboardTrending',
-                'image': '/static/images/default_trendy.png',
-                'video': None
-            }
-            trend['id'] = generate_stable_id(trend)
-            results.append(trend)
-        logger.debug(f"Billboard: Fetched {len(results)} trends")
-        return results
-    except Exception as e:
-        logger.error(f"Error fetching Billboard trends: {e}", exc_info=True)
-        return []
+        with os.fdopen(fd, 'wb') as f:
+            f.write(data)
+        os.replace(tmp, path)
+    except OSError:
+        os.unlink(tmp)
+        raise
+
+def build_assets():
+    manifest = {}
+    for root, _, files in os.walk(app.static_folder):
+        for name in files:
+            source = os.path.join(root, name)
+            logical = os.path.relpath(source, app.static_folder).replace(os.sep, '/')
+            with open(source, 'rb') as f:
+                data = f.read()
+            stem, ext = os.path.splitext(logical)
+            hashed = f"{stem}.{hashlib.md5(data).hexdigest()[:10]}{ext}"
+            target = os.path.join(ASSET_DIR, hashed)
+            os.makedirs(os.path.dirname(target), exist_ok=True)
+            # Compressed copies first, so a plain file on disk means the
+            # set is complete for any worker that looks
+            if ext in ASSET_COMPRESSIBLE:
+                write_asset(f"{target}.gz", gzip.compress(data, compresslevel=9))
+                if brotli:
+                    write_asset(f"{target}.br", brotli.compress(data, quality=11))
+            write_asset(target, data)
+            manifest[logical] = hashed
+    asset_manifest.clear()
+    asset_manifest.update(manifest)
+    return manifest
+
+def asset_url(path):
+    path = path.lstrip('/')
+    if path.startswith('static/'):
+        path = path[len('static/'):]
+    hashed = asset_manifest.get(path)
+    return f"/assets/{hashed}" if hashed else f"/static/{path}"
+
+app.jinja_env.globals.update(asset_url=asset_url)
+
+@app.cli.command('build-assets')
+def build_assets_command():
+    print(f"Built {len(build_assets())} assets into {ASSET_DIR}")
 
-def get_imdb_trending():
-    url = 'https://www.imdb.com/chart/moviemeter/'
-    headers = {
-        'User-Agent': 'Mozilla/5.0 (Windows NT 10.0; Win64; x64) Chrome/112.0.0.0',
-        'Accept': 'text/html,application/xhtml+xml,application/xml;q=0.9,image/webp,*/*;q=0.8',
-        'Accept-Language': 'en-US,en;q=0.5'
-    }
+try:
+    build_assets()
+    logger.debug(f"Built {len(asset_manifest)} assets into {ASSET_DIR}")
+except Exception as e:
+    logger.error(f"Error building assets, serving plain static files: {e}", exc_info=True)
+
+# ---------------------------- IMAGE PROXY ---------------------------- #
+
+# Card images are served from /img/<key>-<width>. The remote image is fetched
+# once, shrunk to that width and written under the hash of the thumbnail
+# bytes, so a picture reachable through several URLs is stored once. The
+# index maps (key, width, format) to a blob and lives in index.sqlite next to
+# the blobs, so every worker shares one cache and one IMAGE_CACHE_BYTES
+# budget. Once the cache passes it, the least recently used entries go and
+# blobs nothing points to any more are deleted, all inside the write
+# transaction that added the new blob, so no worker can evict a blob another
+# one is about to point at. Without Pillow the original bytes are cached
+# unresized.
+IMAGE_CACHE_DIR = os.getenv('IMAGE_CACHE_DIR', os.path.join(os.path.dirname(db_path), 'image_cache'))
+IMAGE_CACHE_BYTES = int(os.getenv('IMAGE_CACHE_BYTES', str(200 * 1024 * 1024)))
+IMAGE_MAX_BYTES = int(os.getenv('IMAGE_MAX_BYTES', str(10 * 1024 * 1024)))
+IMAGE_PREFETCH = os.getenv('IMAGE_PREFETCH', '1') == '1'
+IMAGE_PREFETCH_WORKERS = int(os.getenv('IMAGE_PREFETCH_WORKERS', '4'))
+IMAGE_TIMEOUT = float(os.getenv('IMAGE_TIMEOUT', '10'))
+THUMB_WIDTHS = tuple(int(width) for width in os.getenv('THUMB_WIDTHS', '480,960').split(','))
+IMAGE_SOURCES_SIZE = 20000
+IMAGE_TOUCH_INTERVAL = 60
+WEBP_SUPPORTED = Image is not None and image_features.check('webp')
+image_sources = OrderedDict()
+image_inflight = {}
+image_db = None
+image_lock = threading.Lock()
+image_prefetch_thread = None
+
+def image_key(url):
+    return hashlib.sha1(url.encode('utf-8')).hexdigest()[:20]
+
+def thumb_url(url, width=None):
+    if url and url.startswith('/static/'):
+        return asset_url(url)
+    if not url or not url.startswith(('http://', 'https://')):
+        return url
+    key = image_key(url)
+    with image_lock:
+        image_sources[key] = url
+        image_sources.move_to_end(key)
+        if len(image_sources) > IMAGE_SOURCES_SIZE:
+            image_sources.popitem(last=False)
+    return f"/img/{key}-{width or THUMB_WIDTHS[0]}"
+
+app.jinja_env.globals.update(thumb_url=thumb_url)
+
+def image_format(accept):
+    if Image is None:
+        return 'orig'
+    return 'webp' if WEBP_SUPPORTED and 'image/webp' in accept else 'jpeg'
+
+def image_index():
+    # One connection per process, only used under image_lock
+    global image_db
+    if image_db is None:
+        os.makedirs(IMAGE_CACHE_DIR, exist_ok=True)
+        conn = sqlite3.connect(os.path.join(IMAGE_CACHE_DIR, 'index.sqlite'), timeout=IMAGE_TIMEOUT,
+                               isolation_level=None, check_same_thread=False)
+        conn.execute('PRAGMA journal_mode=WAL')
+        conn.execute('CREATE TABLE IF NOT EXISTS images (entry_key TEXT PRIMARY KEY, image_key TEXT NOT NULL, url TEXT NOT NULL, '
+                     'blob TEXT NOT NULL, mimetype TEXT NOT NULL, size INTEGER NOT NULL, used REAL NOT NULL)')
+        conn.execute('CREATE INDEX IF NOT EXISTS images_used ON images (used)')
+        conn.execute('CREATE INDEX IF NOT EXISTS images_blob ON images (blob)')
+        conn.execute('CREATE INDEX IF NOT EXISTS images_image_key ON images (image_key)')
+        image_db = conn
+    return image_db
+
+def lookup_image(entry_key):
+    conn = image_index()
+    row = conn.execute('SELECT blob, mimetype, size, used FROM images WHERE entry_key = ?', (entry_key,)).fetchone()
+    if row is None:
+        return None
+    blob, mimetype, size, used = row
+    if not os.path.exists(os.path.join(IMAGE_CACHE_DIR, blob)):
+        conn.execute('DELETE FROM images WHERE entry_key = ?', (entry_key,))
+        return None
+    # Recency only orders eviction, so a hit writes it at most once a minute
+    now = time.time()
+    if now - used > IMAGE_TOUCH_INTERVAL:
+        conn.execute('UPDATE images SET used = ? WHERE entry_key = ?', (now, entry_key))
+    return blob, mimetype, size
+
+def image_source(key):
+    with image_lock:
+        url = image_sources.get(key)
+        if url:
+            return url
+        # The page may have been rendered by another worker; any worker that
+        # cached some size of this image recorded where it came from
+        row = image_index().execute('SELECT url FROM images WHERE image_key = ? LIMIT 1', (key,)).fetchone()
+    return row[0] if row else None
+
+def make_thumbnail(data, width, image_type):
+    with Image.open(io.BytesIO(data)) as image:
+        image.thumbnail((width, width * 3))
+        if image_type == 'jpeg' and image.mode != 'RGB':
+            image = image.convert('RGB')
+        elif image.mode not in ('RGB', 'RGBA'):
+            image = image.convert('RGBA')
+        output = io.BytesIO()
+        image.save(output, format=image_type.upper(), quality=80)
+    return output.getvalue()
+
+def store_image(key, url, entry_key, data, mimetype):
+    blob = hashlib.sha256(data).hexdigest()
+    evicted = []
+    with image_lock:
+        conn = image_index()
+        conn.execute('BEGIN IMMEDIATE')
+        try:
+            write_asset(os.path.join(IMAGE_CACHE_DIR, blob), data)
+            conn.execute('INSERT OR REPLACE INTO images VALUES (?, ?, ?, ?, ?, ?, ?)',
+                         (entry_key, key, url, blob, mimetype, len(data), time.time()))
+            total = conn.execute('SELECT COALESCE(SUM(size), 0) FROM (SELECT MAX(size) AS size FROM images GROUP BY blob)').fetchone()[0]
+            while total > IMAGE_CACHE_BYTES:
+                row = conn.execute('SELECT entry_key, blob, size FROM images WHERE entry_key != ? ORDER BY used LIMIT 1', (entry_key,)).fetchone()
+                if row is None:
+                    break
+                old_key, old_blob, old_size = row
+                conn.execute('DELETE FROM images WHERE entry_key = ?', (old_key,))
+                if not conn.execute('SELECT 1 FROM images WHERE blob = ? LIMIT 1', (old_blob,)).fetchone():
+                    total -= old_size
+                    evicted.append(old_blob)
+            for old_blob in evicted:
+                try:
+                    os.unlink(os.path.join(IMAGE_CACHE_DIR, old_blob))
+                except OSError:
+                    pass
+            conn.execute('COMMIT')
+        except BaseException:
+            conn.execute('ROLLBACK')
+            raise
+    if evicted:
+        logger.debug(f"Evicted {len(evicted)} cached images")
+    return blob, mimetype, len(data)
+
+def fetch_image(url, key, entry_key, width, image_type):
+    response = http_session.get(url, headers=BROWSER_HEADERS, timeout=IMAGE_TIMEOUT, stream=True)
     try:
-        response = requests.get(url, headers=headers, timeout=10)
         response.raise_for_status()
-        soup = BeautifulSoup(response.text, 'html.parser')
-        rows = soup.select('ul.ipc-metadata-list li.ipc-metadata-list-summary-item')
-        results = []
-        for i, row in enumerate(rows[:25]):
-            title_column = row.select_one('a.ipc-title-link-wrapper')
-            if not title_column:
-                continue
-            title = title_column.text.strip().split('. ', 1)[-1]
-            link = 'https://www.imdb.com' + title_column['href'].split('?')[0]
-            year_span = row.select_one('span.sc-b189961a-8')
-            year = year_span.text.strip() if year_span else ''
-            description = f'Rank #{i+1} trending on IMDb Moviemeter {year}'
-            image_tag = row.select_one('img.ipc-image')
-            image = image_tag['src'] if image_tag and image_tag.has_attr('src') else '/static/images/default_trendy.png'
-            trend = {
-                'title': title,
-                'description': description,
-                'link': link,
-                'source': 'From IMDb',
-                'source_class': 'IMDbTrending',
-                'image': image,
-                'video': None
-            }
-            trend['id'] = generate_stable_id(trend)
-            results.append(trend)
-        logger.debug(f"IMDb: Fetched {len(results)} trends")
-        return results
+        data = response.raw.read(IMAGE_MAX_BYTES + 1, decode_content=True)
+    finally:
+        response.close()
+    if len(data) > IMAGE_MAX_BYTES:
+        raise ValueError(f"image larger than {IMAGE_MAX_BYTES} bytes")
+    if image_type == 'orig':
+        mimetype = response.headers.get('Content-Type', 'application/octet-stream')
+    else:
+        data = make_thumbnail(data, width, image_type)
+        mimetype = f"image/{image_type}"
+    return store_image(key, url, entry_key, data, mimetype)
+
+def get_image(key, width, image_type):
+    entry_key = f"{key}-{width}.{image_type}"
+    with image_lock:
+        entry = lookup_image(entry_key)
+        if entry:
+            return entry
+        # Concurrent misses for one image in this worker wait for the first fetch
+        done = image_inflight.get(entry_key)
+        owner = done is None
+        if owner:
+            done = image_inflight[entry_key] = threading.Event()
+    if not owner:
+        done.wait(IMAGE_TIMEOUT)
+        with image_lock:
+            return lookup_image(entry_key)
+    url = None
+    try:
+        url = image_source(key)
+        if not url:
+            return None
+        return fetch_image(url, key, entry_key, width, image_type)
     except Exception as e:
-        logger.error(f"Error fetching IMDb trends: {e}", exc_info=True)
-        return []
+        hot_logger.warning("Could not cache image %s: %s", url or key, e)
+        return None
+    finally:
+        with image_lock:
+            image_inflight.pop(entry_key, None)
+        done.set()
+
+def prefetch_images(trends):
+    started = time.perf_counter()
+    keys = []
+    for url in {trend.get('image') for trend in trends}:
+        if url and url.startswith(('http://', 'https://')):
+            thumb_url(url)
+            keys.append(image_key(url))
+    image_type = image_format('image/webp')
+    with ThreadPoolExecutor(max_workers=IMAGE_PREFETCH_WORKERS) as pool:
+        cached = sum(1 for entry in pool.map(lambda key: get_image(key, THUMB_WIDTHS[0], image_type), keys) if entry)
+    logger.debug(f"Prefetched {cached}/{len(keys)} images in {time.perf_counter() - started:.2f}s")
+
+def start_image_prefetch(trends):
+    global image_prefetch_thread
+    if not IMAGE_PREFETCH or (image_prefetch_thread and image_prefetch_thread.is_alive()):
+        return
+    image_prefetch_thread = threading.Thread(target=prefetch_images, args=(list(trends),), daemon=True)
+    image_prefetch_thread.start()
+
+# ---------------------------- SOURCE REGISTRY ---------------------------- #
 
-def get_cnn_trending():
-    url = 'https://www.cnn.com/world'
-    headers = {
-        'User-Agent': 'Mozilla/5.0 (Windows NT 10.0; Win64; x64) Chrome/112.0.0.0',
-        'Accept': 'text/html,application/xhtml+xml,application/xml;q=0.9,image/webp,*/*;q=0.8',
-        'Accept-Language': 'en-US,en;q=0.5'
+try:
+    import lxml  # noqa: F401
+    DEFAULT_HTML_PARSER = 'lxml'
+except ImportError:
+    DEFAULT_HTML_PARSER = 'html.parser'
+HTML_PARSER = os.getenv('HTML_PARSER', DEFAULT_HTML_PARSER)
+
+DEFAULT_HEADERS = {'User-Agent': 'Mozilla/5.0 (Windows NT 10.0; Win64; x64) Chrome/112.0.0.0'}
+BROWSER_HEADERS = {
+    'User-Agent': 'Mozilla/5.0 (Windows NT 10.0; Win64; x64) Chrome/112.0.0.0',
+    'Accept': 'text/html,application/xhtml+xml,application/xml;q=0.9,image/webp,*/*;q=0.8',
+    'Accept-Language': 'en-US,en;q=0.5'
+}
+
+source_registry = {}
+
+def finalize_github(trend, item, index):
+    trend['title'] = trend['title'].replace('\n', '').replace(' ', '')
+    return trend
+
+def finalize_steam(trend, item, index):
+    app_id = trend['link'].rstrip('/').split('/')[-1]
+    trend['image'] = f'https://cdn.cloudflare.steamstatic.com/steam/apps/{app_id}/header.jpg'
+    return trend
+
+def finalize_billboard(trend, item, index):
+    artist_tag = item.find_next('span')
+    artist = artist_tag.get_text(strip=True) if artist_tag else 'Unknown Artist'
+    trend['title'] = f"{trend['title']} — {artist}"
+    trend['description'] = f'#{index + 1} on Billboard Hot 100'
+    return trend
+
+def finalize_imdb(trend, item, index):
+    trend['title'] = trend['title'].split('. ', 1)[-1]
+    year_span = item.select_one('span.sc-b189961a-8')
+    year = year_span.text.strip() if year_span else ''
+    trend['description'] = f'Rank #{index + 1} trending on IMDb Moviemeter {year}'
+    return trend
+
+def finalize_cnn(trend, item, index):
+    trend['description'] = f'#{index + 1} on CNN World'
+    parent = item.find_parent()
+    image_tag = parent.select_one('img') if parent else None
+    if image_tag and image_tag.has_attr('src'):
+        trend['image'] = image_tag['src']
+    return trend
+
+def finalize_reuters(trend, item, index):
+    trend['description'] = f'#{index + 1} on Reuters'
+    return trend
+
+# Each spec describes one listing page: where to fetch it, which elements are
+# trend items, and how to read each field from an item. Field values are
+# (selector, attr) pairs; selector None means the item itself, attr 'text'
+# is .text.strip(), 'strip' is get_text(strip=True), anything else is an
+# HTML attribute. 'strain' is passed to SoupStrainer so only those subtrees
+# get built.
+SOURCE_SPECS = [
+    {
+        'name': 'get_hacker_news',
+        'url': 'https://news.ycombinator.com/',
+        'source': 'From Hacker News',
+        'source_class': 'HackerTrending',
+        'items': '.athing',
+        'strain': {'name': 'tr', 'class_': 'athing'},
+        'fields': {'title': ('.titleline', 'text'), 'link': ('.titleline a', 'href')}
+    },
+    {
+        'name': 'get_github_trending',
+        'url': 'https://github.com/trending',
+        'source': 'From GitHub',
+        'source_class': 'GithubTrending',
+        'items': 'article.Box-row',
+        'strain': {'name': 'article', 'class_': 'Box-row'},
+        'fields': {'title': ('h2', 'text'), 'link': ('h2 a', 'href'), 'description': ('p', 'text')},
+        'finalize': finalize_github
+    },
+    {
+        'name': 'get_techcrunch',
+        'url': 'https://techcrunch.com/',
+        'source': 'From TechCrunch',
+        'source_class': 'TechcrunchTrending',
+        'items': 'div.post-block',
+        'strain': {'name': 'div', 'class_': 'post-block'},
+        'fields': {
+            'title': ('a.post-block__title__link', 'strip'),
+            'link': ('a.post-block__title__link', 'href'),
+            'description': ('.post-block__content', 'strip'),
+            'image': ('img', 'src')
+        },
+        'default_image': '/static/images/default_trendy.svg'
+    },
+    {
+        'name': 'get_stackoverflow_trending',
+        'url': 'https://stackoverflow.com/questions?tab=Hot',
+        'base': 'https://stackoverflow.com',
+        'source': 'From Stack Overflow',
+        'source_class': 'StackoverflowTrending',
+        'items': '.s-post-summary',
+        'strain': {'class_': 's-post-summary'},
+        'fields': {'title': ('.s-link', 'text'), 'link': ('.s-link', 'href'), 'description': ('.s-post-summary--content-excerpt', 'text')}
+    },
+    {
+        'name': 'get_devto_latest',
+        'url': 'https://dev.to/',
+        'headers': BROWSER_HEADERS,
+        'source': 'From Dev.to',
+        'source_class': 'DevtoTrending',
+        'items': 'div.crayons-story',
+        'strain': {'name': 'div', 'class_': 'crayons-story'},
+        'fields': {
+            'title': ('h2.crayons-story__title a', 'text'),
+            'link': ('h2.crayons-story__title a', 'href'),
+            'description': ('p.crayons-story__snippet', 'text')
+        }
+    },
+    {
+        'name': 'get_medium_technology',
+        'url': 'https://medium.com/tag/technology',
+        'base': 'https://medium.com',
+        'source': 'From Medium Technology',
+        'source_class': 'MediumtechTrending',
+        'items': 'article',
+        'strain': {'name': 'article'},
+        'strip_query': True,
+        'fields': {'title': ('h2', 'text'), 'link': ('a[href]', 'href'), 'description': ('div[aria-hidden="true"] p', 'text')}
+    },
+    {
+        'name': 'get_lobsters',
+        'url': 'https://lobste.rs/',
+        'source': 'From Lobsters',
+        'source_class': 'LobstersTrending',
+        'items': '.story .link a',
+        'strain': {'class_': 'story'},
+        'fields': {'title': (None, 'text'), 'link': (None, 'href')}
+    },
+    {
+        'name': 'get_slashdot',
+        'url': 'https://slashdot.org/',
+        'source': 'From Slashdot',
+        'source_class': 'SlashdotTrending',
+        'items': '.story',
+        'strain': {'class_': 'story'},
+        'fields': {'title': ('.story-title a', 'text'), 'link': ('.story-title a', 'href'), 'description': ('.p', 'text')}
+    },
+    {
+        'name': 'get_digg_popular',
+        'url': 'https://digg.com/',
+        'source': 'From Digg',
+        'source_class': 'DiggTrending',
+        'items': 'article.story-item',
+        'strain': {'name': 'article', 'class_': 'story-item'},
+        'fields': {'title': ('h2', 'text'), 'link': ('a.story-link', 'href'), 'description': ('.story-content p', 'text'), 'image': ('img', 'src')},
+        'default_image': '/static/images/default_trendy.svg'
+    },
+    {
+        'name': 'get_bbc_trending',
+        'url': 'https://www.bbc.com/news',
+        'source': 'From BBC',
+        'source_class': 'BBCTrending',
+        'items': 'div.gs-c-promo',
+        'strain': {'name': 'div', 'class_': 'gs-c-promo'},
+        'fields': {'title': ('h3', 'text'), 'link': ('a.gs-c-promo-heading', 'href'), 'description': ('.gs-c-promo-summary', 'text'), 'image': ('img', 'src')},
+        'default_image': '/static/images/default_trendy.svg'
+    },
+    {
+        'name': 'get_ars_technica',
+        'url': 'https://arstechnica.com/',
+        'source': 'From Ars Technica',
+        'source_class': 'ArsTechnicaTrending',
+        'items': 'article.tease',
+        'strain': {'name': 'article', 'class_': 'tease'},
+        'fields': {'title': ('h2 a', 'text'), 'link': ('h2 a', 'href'), 'description': ('p.excerpt', 'text'), 'image': ('img', 'src')}
+    },
+    {
+        'name': 'get_wired',
+        'url': 'https://www.wired.com/feed/rss',
+        'parser': 'xml',
+        'source': 'From Wired',
+        'source_class': 'WiredTrending',
+        'items': 'item',
+        'strain': {'name': 'item'},
+        'fields': {'title': ('title', 'text'), 'link': ('link', 'text'), 'description': ('description', 'text')}
+    },
+    {
+        'name': 'get_goodreads_trending',
+        'url': 'https://www.goodreads.com/book/popular_by_date/2025',
+        'source': 'From Goodreads',
+        'source_class': 'GoodreadsTrending',
+        'items': 'div.tableList tr',
+        'strain': {'class_': 'tableList'},
+        'fields': {'title': ('a.bookTitle', 'text'), 'link': ('a.bookTitle', 'href'), 'image': ('img.bookCover', 'src')},
+        'required': ('title', 'image')
+    },
+    {
+        'name': 'get_steam_charts',
+        'url': 'https://steamcharts.com/top',
+        'source': 'From Steam Charts',
+        'source_class': 'SteamChartsTrending',
+        'items': 'table.common-table tbody tr',
+        'strain': {'name': 'table', 'class_': 'common-table'},
+        'fields': {'title': ('td.game-name > a', 'text'), 'link': ('td.game-name > a', 'href')},
+        'finalize': finalize_steam
+    },
+    {
+        'name': 'get_billboard_trending',
+        'url': 'https://www.billboard.com/charts/hot-100',
+        'source': 'From Billboard',
+        'source_class': 'BillboardTrending',
+        'items': 'li.o-chart-results-list__item h3',
+        'strain': {'name': 'li', 'class_': 'o-chart-results-list__item'},
+        'fields': {'title': (None, 'strip')},
+        'finalize': finalize_billboard
+    },
+    {
+        'name': 'get_imdb_trending',
+        'url': 'https://www.imdb.com/chart/moviemeter/',
+        'headers': BROWSER_HEADERS,
+        'base': 'https://www.imdb.com',
+        'source': 'From IMDb',
+        'source_class': 'IMDbTrending',
+        'items': 'ul.ipc-metadata-list li.ipc-metadata-list-summary-item',
+        'strain': {'name': 'ul', 'class_': 'ipc-metadata-list'},
+        'strip_query': True,
+        'fields': {'title': ('a.ipc-title-link-wrapper', 'text'), 'link': ('a.ipc-title-link-wrapper', 'href'), 'image': ('img.ipc-image', 'src')},
+        'finalize': finalize_imdb
+    },
+    {
+        # Card images live next to the headline link, so the whole page is parsed
+        'name': 'get_cnn_trending',
+        'url': 'https://www.cnn.com/world',
+        'headers': BROWSER_HEADERS,
+        'source': 'From CNN',
+        'source_class': 'CNNTrending',
+        'items': 'a.container__link--type-article',
+        'fields': {'title': (None, 'strip'), 'link': (None, 'href')},
+        'finalize': finalize_cnn
+    },
+    {
+        'name': 'get_reuters_trending',
+        'url': 'https://www.reuters.com/',  # Main page, /world/ answers 401
+        'headers': dict(BROWSER_HEADERS, Referer='https://www.reuters.com/'),
+        'source': 'From Reuters',
+        'source_class': 'ReutersTrending',
+        'items': "a[data-testid='Heading']",
+        'strain': {'name': 'a', 'attrs': {'data-testid': 'Heading'}},
+        'limit': 10,
+        'fields': {'title': (None, 'strip'), 'link': (None, 'href')},
+        'finalize': finalize_reuters
     }
-    try:
-        response = requests.get(url, headers=headers, timeout=10)
-        response.raise_for_status()
-        soup = BeautifulSoup(response.text, 'html.parser')
-        articles = soup.select('a.container__link--type-article')
-        results = []
-        for i, article in enumerate(articles[:25]):
-            title = article.get_text(strip=True)
-            if not title:
+]
+
+def extract_field(item, field):
+    selector, attr = field
+    node = item if selector is None else item.select_one(selector)
+    if node is None:
+        return None
+    if attr == 'text':
+        return node.text.strip()
+    if attr == 'strip':
+        return node.get_text(strip=True)
+    return node.get(attr)
+
+def spec_strainer(strain):
+    # SoupStrainer compares class_ with the whole attribute, so a bare 'athing'
+    # would skip <tr class="athing submission">; match it as one class instead
+    if 'class_' in strain:
+        wanted = strain['class_']
+        strain = dict(strain, class_=lambda value: bool(value) and wanted in value.split())
+    return SoupStrainer(**strain)
+
+def parse_source(spec, markup, parser=None):
+    parser = spec.get('parser') or parser or HTML_PARSER
+    strain = spec.get('strain')
+    parse_only = spec_strainer(strain) if strain else None
+    soup = BeautifulSoup(markup, parser, parse_only=parse_only)
+    base = spec.get('base', spec['url'])
+    fields = spec['fields']
+    required = spec.get('required', ('title',))
+    finalize = spec.get('finalize')
+    results = []
+    for index, item in enumerate(soup.select(spec['items'])[:spec.get('limit', 25)]):
+        values = {name: extract_field(item, field) for name, field in fields.items()}
+        if any(not values.get(name) for name in required):
+            continue
+        link = values.get('link')
+        if link:
+            if spec.get('strip_query'):
+                link = link.split('?')[0]
+            link = urljoin(base, link)
+        trend = {
+            'title': values['title'],
+            'description': values.get('description') or '',
+            'link': link or spec['url'],
+            'source': spec['source'],
+            'source_class': spec['source_class'],
+            'image': values.get('image') or spec.get('default_image', '/static/images/default_trendy.png'),
+            'video': None
+        }
+        if finalize:
+            trend = finalize(trend, item, index)
+            if not trend:
                 continue
-            link = article['href']
-            if not link.startswith('http'):
-                link = f'https://www.cnn.com{link}'
-            description = f'#{i+1} on CNN World'
-            image_tag = article.find_parent().select_one('img')
-            image = image_tag['src'] if image_tag and image_tag.has_attr('src') else '/static/images/default_trendy.png'
-            trend = {
-                'title': title,
-                'description': description,
-                'link': link,
-                'source': 'From CNN',
-                'source_class': 'CNNTrending',
-                'image': image,
-                'video': None
-            }
-            trend['id'] = generate_stable_id(trend)
-            results.append(trend)
-        logger.debug(f"CNN: Fetched {len(results)} trends")
-        return results
+        trend['id'] = generate_stable_id(trend)
+        results.append(trend)
+    return results
+
+def scrape_source(spec):
+    # Errors propagate so run_source records them against the source
+    response = http_get(spec['url'], headers=spec.get('headers', DEFAULT_HEADERS), timeout=10)
+    if response.status_code == 304:
+        return cached_results(response)
+    response.raise_for_status()
+    markup = response.content if spec.get('parser') == 'xml' else response.text
+    results = parse_source(spec, markup)
+    logger.debug(f"{spec['source']}: Fetched {len(results)} trends")
+    return remember_results(response, results)
+
+def register_source(source):
+    if callable(source):
+        source_registry[source.__name__] = source
+        return source
+    def scraper():
+        return scrape_source(source)
+    scraper.__name__ = source['name']
+    scraper.spec = source
+    source_registry[source['name']] = scraper
+    return scraper
+
+for spec in SOURCE_SPECS:
+    register_source(spec)
+register_source(get_reddit_top)
+
+ACTIVE_SOURCES = [
+    'get_hacker_news',
+    'get_github_trending',
+    'get_medium_technology',
+    'get_stackoverflow_trending',
+    'get_devto_latest',
+    'get_lobsters',
+    'get_slashdot',
+    'get_wired',
+    'get_steam_charts',
+    'get_billboard_trending',
+    'get_imdb_trending',
+    'get_cnn_trending'
+]
+if os.getenv('TREND_SOURCES'):
+    ACTIVE_SOURCES = [name.strip() for name in os.getenv('TREND_SOURCES').split(',') if name.strip()]
+mark_startup('sources')
+
+# ---------------------------- CONCURRENT FETCH ---------------------------- #
+
+def run_source(func):
+    started = time.monotonic()
+    try:
+        trends = func()
+        error = None
     except Exception as e:
-        logger.error(f"Error fetching CNN trends: {e}", exc_info=True)
-        return []
-    
-def fetch_reuters_trending():
-    url = "https://www.reuters.com/"  # Changed to main page due to 401 error on /world/
-    headers = {
-        "User-Agent": "Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/91.0.4472.124 Safari/537.36",
-        "Accept": "text/html,application/xhtml+xml,application/xml;q=0.9,image/webp,*/*;q=0.8",
-        "Accept-Language": "en-US,en;q=0.5",
-        "Referer": "https://www.reuters.com/"
+        logger.error(f"Error in {func.__name__}: {e}", exc_info=True)
+        trends = []
+        error = str(e)
+    return trends, time.monotonic() - started, error
+
+def fetch_sources_concurrently(funcs, deadline=FETCH_DEADLINE):
+    results = {}
+    stats = {}
+    executor = ThreadPoolExecutor(max_workers=len(funcs), thread_name_prefix='fetch')
+    futures = {executor.submit(run_source, func): func for func in funcs}
+    done, pending = wait(futures, timeout=deadline)
+    executor.shutdown(wait=False, cancel_futures=True)
+    now = datetime.now(timezone.utc).isoformat()
+    for future in done:
+        name = futures[future].__name__
+        trends, elapsed, error = future.result()
+        if error:
+            status = 'error'
+        elif not trends or not isinstance(trends, list):
+            status = 'empty'
+        else:
+            status = 'ok'
+            results[name] = trends
+        stats[name] = {'status': status, 'latency': round(elapsed, 3), 'count': len(trends) if isinstance(trends, list) else 0, 'error': error, 'fetched_at': now}
+        FETCH_SECONDS.observe(elapsed, name)
+        FETCH_ITEMS.inc(stats[name]['count'], name)
+        FETCH_RESULTS.inc(1, name, status)
+    for future in pending:
+        name = futures[future].__name__
+        logger.warning(f"Source {name} missed the {deadline}s fetch deadline")
+        stats[name] = {'status': 'timeout', 'latency': deadline, 'count': 0, 'error': 'deadline exceeded', 'fetched_at': now}
+        FETCH_SECONDS.observe(deadline, name)
+        FETCH_RESULTS.inc(1, name, 'timeout')
+    source_stats.update(stats)
+    return results
+
+# ---------------------------- AGGREGATE AND CACHE ---------------------------- #
+
+SOURCE_CLASSES = {spec['source']: spec['source_class'] for spec in SOURCE_SPECS}
+SOURCE_CLASSES.update({
+    'From Reddit': 'RedditTrending',
+    'From YouTube': 'YouTubeTrending',
+    'From Spotify Charts': 'SpotifyTrending'
+})
+
+def trend_to_dict(t):
+    return {
+        'id': t.id,
+        'title': t.title,
+        'image': t.image,
+        'description': t.description,
+        'link': t.link,
+        'source': t.source,
+        'source_class': SOURCE_CLASSES.get(t.source, t.source),
+        'timestamp': t.timestamp.isoformat() if t.timestamp.tzinfo else t.timestamp.replace(tzinfo=timezone.utc).isoformat(),
+        'video': None
     }
 
+def trend_sort_key(trend):
+    return (datetime.fromisoformat(trend['timestamp']).astimezone(timezone.utc), trend['id'])
+
+def snapshot_generation(trends):
+    # Named after the set of ids it holds, so workers that fetched the same
+    # trends agree on it and a page can resume on any of them
+    ids = '\n'.join(sorted(trend['id'] for trend in trends))
+    return hashlib.sha1(ids.encode('utf-8')).hexdigest()[:16]
+
+def publish_trends(trends, diff=None):
+    global global_trends, trend_snapshot, trend_generation
+    previous_generation = trend_generation
+    # Keyset pages for /api/trends are cut from ascending (timestamp, id)
+    # lists, overall and per source, with bisect.
+    ordered = sorted(trends, key=trend_sort_key)
+    keys = [trend_sort_key(trend) for trend in ordered]
+    by_source = {}
+    for trend, key in zip(ordered, keys):
+        # Merged cards are listed under every source they came from
+        for source in {entry['source'] for entry in trend.get('sources') or [trend]}:
+            bucket = by_source.setdefault(source, ([], []))
+            bucket[0].append(trend)
+            bucket[1].append(key)
+    # Home page orders: newest first, shuffled with each fixed seed
+    variants = []
+    for seed in range(max(1, HOME_VARIANTS)):
+        shuffled = ordered[::-1]
+        random.Random(seed).shuffle(shuffled)
+        variants.append({'trends': shuffled, 'position': {trend['id']: i for i, trend in enumerate(shuffled)}})
+    snapshot = {
+        'trends': trends,
+        'by_id': {trend['id']: trend for trend in trends},
+        'ordered': (ordered, keys),
+        'by_source': by_source,
+        'variants': variants,
+        'api_cache': {},
+        'page_cache': {},
+        'diff': diff,
+        'generation': snapshot_generation(trends)
+    }
     try:
-        response = requests.get(url, headers=headers, timeout=10)
-        response.raise_for_status()
-        soup = BeautifulSoup(response.text, "html.parser")
-
-        # Updated selector based on Reuters homepage structure (may need adjustment)
-        articles = soup.select("a[data-testid='Heading']")  # Adjust selector after inspecting page
-        results = []
-        for i, article in enumerate(articles[:10]):
-            title = article.get_text(strip=True)
-            link = article['href']
-            if not link.startswith("http"):
-                link = f"https://www.reuters.com{link}"
+        api_response(snapshot, None, None, None, API_PAGE_SIZE, None)
+    except Exception as e:
+        logger.error(f"Error warming /api/trends cache: {e}", exc_info=True)
+    trend_snapshot = snapshot
+    trend_generation = snapshot['generation']
+    global_trends = trends
+    try:
+        push_trend_delta(snapshot, previous_generation)
+    except Exception as e:
+        logger.error(f"Error pushing trend delta: {e}", exc_info=True)
+    return snapshot
 
-            trend = {
-                "id": str(uuid.uuid4()),  # Temporary ID
-                "title": title,
-                "description": f"#{i + 1} on Reuters",
-                "link": link,
-                "source": "From Reuters",
-                "source_class": "ReutersTrending",
-                "image": "/static/images/default_trendy.png",
-                "video": None
-            }
-            trend['id'] = generate_stable_id(trend)  # Assign stable ID inside loop
-            results.append(trend)  # Append inside loop
+def find_trend(trend_id):
+    trend = trend_snapshot['by_id'].get(trend_id)
+    if trend:
+        return trend
+    try:
+        row = db.session.get(Trend, trend_id)
+    except Exception as e:
+        logger.error(f"Error loading trend {trend_id}: {e}", exc_info=True)
+        return None
+    return trend_to_dict(row) if row else None
+
+
+# ---------------------------- NEAR-DUPLICATES ---------------------------- #
+
+# The same story from several outlets gets a different id per outlet, so each
+# fetch is clustered before it is stored. Titles are shingled into word 1-,
+# 2- and 3-grams, so a word the two titles do not share spoils every n-gram
+# it is part of: "Earthquake strikes Japan" and "Earthquake strikes Turkey"
+# score 0.33, not the 0.5 their word sets would. MinHash signatures with LSH
+# bands (rows per band chosen for a ~0.5 Jaccard cut-off) turn up candidate
+# pairs, the exact Jaccard has to reach DEDUP_THRESHOLD, and when both trends
+# have a lead, the leads have to share DEDUP_LEAD_OVERLAP of their words too.
+# A cluster never holds two trends from the same source. Its card keeps an id
+# the story already had on the page or in the table, so it keeps its place,
+# votes and chat; only a new story falls back to its best-illustrated member.
+# Every source is listed under 'sources'. `flask check-dedup` runs the
+# DEDUP_CHECKS pairs below through the clustering.
+DEDUP_ENABLED = os.getenv('DEDUP', '1') == '1'
+DEDUP_THRESHOLD = float(os.getenv('DEDUP_THRESHOLD', '0.7'))
+DEDUP_LEAD_OVERLAP = float(os.getenv('DEDUP_LEAD_OVERLAP', '0.3'))
+DEDUP_LEAD_WORDS = 30
+DEDUP_NGRAMS = 3
+DEDUP_STOP_WORDS = STOP_WORDS | {'a', 'an', 'as', 'at', 'be', 'by', 'in', 'is', 'it', 'its', 'of', 'on', 'or', 'to'}
+DEDUP_WORD = re.compile(r"\w+(?:[.']\w+)*")
+MINHASH_BANDS = 15
+MINHASH_ROWS = 4
+MINHASH_PRIME = (1 << 61) - 1
+minhash_random = random.Random(1729)
+MINHASH_PARAMS = [
+    (minhash_random.randrange(1, MINHASH_PRIME), minhash_random.randrange(MINHASH_PRIME))
+    for _ in range(MINHASH_BANDS * MINHASH_ROWS)
+]
+
+# (same story, title, other title); check_dedup expects the first to merge
+DEDUP_CHECKS = [
+    (True, "Apple unveils iPhone 16 at its September event", "Apple unveils iPhone 16 at September event"),
+    (True, "OpenAI releases GPT-5", "OpenAI releases GPT-5 model"),
+    (False, "Earthquake strikes Japan", "Earthquake strikes Turkey"),
+    (False, "Apple announces new iPhone", "Apple announces new iPad"),
+    (False, "Trump signs executive order on tariffs", "Trump signs executive order on TikTok"),
+    (False, "Rust 1.80 released", "Rust 1.81 released")
+]
+
+def dedup_words(text):
+    return [word for word in DEDUP_WORD.findall(str(text or '').lower()) if word not in DEDUP_STOP_WORDS]
+
+def shingles(trend):
+    words = dedup_words(trend.get('title'))
+    result = set()
+    for n in range(1, DEDUP_NGRAMS + 1):
+        result.update(' '.join(words[i:i + n]) for i in range(len(words) - n + 1))
+    return result
+
+def lead_words(trend):
+    return set(dedup_words(trend.get('description'))[:DEDUP_LEAD_WORDS])
+
+def leads_agree(a, b):
+    # Different outlets word their leads differently, so this only asks for
+    # a share of the shorter lead, and nothing when either has none
+    if not a or not b:
+        return True
+    return len(a & b) / min(len(a), len(b)) >= DEDUP_LEAD_OVERLAP
+
+def minhash(tokens):
+    values = [int.from_bytes(hashlib.blake2b(token.encode('utf-8'), digest_size=8).digest(), 'big') for token in tokens]
+    return [min((a * value + b) % MINHASH_PRIME for value in values) for a, b in MINHASH_PARAMS]
+
+def cluster_trends(trends):
+    sets = [shingles(trend) for trend in trends]
+    leads = [lead_words(trend) for trend in trends]
+    buckets = {}
+    for i, tokens in enumerate(sets):
+        if len(tokens) < 3:
+            continue
+        signature = minhash(tokens)
+        for band in range(MINHASH_BANDS):
+            key = (band, tuple(signature[band * MINHASH_ROWS:(band + 1) * MINHASH_ROWS]))
+            buckets.setdefault(key, []).append(i)
+    candidates = set()
+    for members in buckets.values():
+        candidates.update(combinations(members, 2))
+    scored = []
+    for a, b in candidates:
+        if trends[a]['source'] == trends[b]['source']:
+            continue
+        similarity = len(sets[a] & sets[b]) / len(sets[a] | sets[b])
+        if similarity >= DEDUP_THRESHOLD and leads_agree(leads[a], leads[b]):
+            scored.append((similarity, a, b))
+    # Closest pairs are joined first; a join that would put two trends from
+    # one source in the same cluster is skipped
+    parent = list(range(len(trends)))
+    cluster_sources = [{trend['source']} for trend in trends]
+    def root(i):
+        while parent[i] != i:
+            parent[i] = parent[parent[i]]
+            i = parent[i]
+        return i
+    for _, a, b in sorted(scored, reverse=True):
+        ra, rb = root(a), root(b)
+        if ra == rb or cluster_sources[ra] & cluster_sources[rb]:
+            continue
+        parent[rb] = ra
+        cluster_sources[ra] |= cluster_sources[rb]
+    groups = {}
+    for i in range(len(trends)):
+        groups.setdefault(root(i), []).append(i)
+    return list(groups.values())
+
+def has_image(trend):
+    image = trend.get('image') or ''
+    return bool(image) and not image.startswith('/static/images/default_trendy')
+
+def stored_trend_ids(trend_ids):
+    stored = set()
+    try:
+        for i in range(0, len(trend_ids), 500):
+            stored.update(row[0] for row in db.session.query(Trend.id).filter(Trend.id.in_(trend_ids[i:i + 500])))
+    except Exception as e:
+        logger.error(f"Error looking up stored trend ids: {e}", exc_info=True)
+    return stored
+
+def merge_duplicates(trends):
+    merged = []
+    groups = cluster_trends(trends)
+    published = trend_snapshot['by_id']
+    stored = stored_trend_ids([trends[i]['id'] for group in groups if len(group) > 1 for i in group])
+    for group in groups:
+        members = [trends[i] for i in group]
+        if len(members) == 1:
+            merged.append(members[0])
+            continue
+        # A cluster that picked up a new member keeps the id it was shown
+        # and stored under; the image only decides for a new story
+        lead = dict(min(members, key=lambda trend: (
+            trend['id'] not in published, trend['id'] not in stored, not has_image(trend), trend['id'])))
+        members.sort(key=lambda trend: trend['id'] != lead['id'])
+        if not lead.get('description'):
+            lead['description'] = max((trend.get('description') or '' for trend in members), key=len)
+        lead['sources'] = [
+            {'source': trend['source'], 'source_class': trend.get('source_class'), 'link': trend.get('link', '')}
+            for trend in members
+        ]
+        hot_logger.debug("Merged %d trends into %s: %s", len(members), lead['id'], [trend['source'] for trend in members])
+        merged.append(lead)
+    return merged
+
+def snapshot_diff(trend_ids):
+    # The diff is against the published snapshot, so a trend that drops out
+    # and comes back in a later fetch is reported as added again.
+    previous = trend_snapshot['by_id']
+    current = set(trend_ids)
+    return {
+        'added': [trend_id for trend_id in trend_ids if trend_id not in previous],
+        'retained': [trend_id for trend_id in trend_ids if trend_id in previous],
+        'dropped': [trend_id for trend_id in previous if trend_id not in current]
+    }
 
-        return results
+def load_trends_from_db():
+    # For workers without a fetch thread: pick up what the fetching worker
+    # stored, merged and tagged like a fetch and published with a real diff,
+    # so subscribed pages get a delta instead of a reset. Nothing changed
+    # means nothing is published.
+    rows = Trend.query.order_by(Trend.timestamp.desc()).limit(2000).all()
+    trends = [trend_to_dict(t) for t in rows]
+    logger.debug(f"Loaded {len(trends)} trends from database")
+    if DEDUP_ENABLED:
+        try:
+            trends = merge_duplicates(trends)
+        except Exception as e:
+            logger.error(f"Error merging duplicate trends: {e}", exc_info=True)
+    diff = snapshot_diff([trend['id'] for trend in trends])
+    if global_trends and not diff['added'] and not diff['dropped']:
+        return global_trends
+    publish_trends(tag_trends(trends), diff)
+    return global_trends
 
-    except Exception as e:
-        print(f"Error fetching Reuters trending: {e}")
-        return []
-# ---------------------------- AGGREGATE AND CACHE ---------------------------- #
+def sync_trends(trends, now):
+    # Only the ids from this fetch are looked up and only unseen ones are
+    # written, so a cycle costs the same whether the table holds a day or a
+    # week of trends. Retained trends keep their first-seen timestamp.
+    trend_ids = [trend['id'] for trend in trends]
+    first_seen = {}
+    for i in range(0, len(trend_ids), 500):
+        rows = db.session.query(Trend.id, Trend.timestamp).filter(Trend.id.in_(trend_ids[i:i + 500])).all()
+        first_seen.update(rows)
+    new_rows = []
+    for trend in trends:
+        timestamp = first_seen.get(trend['id'])
+        if timestamp is None:
+            new_rows.append({
+                'id': trend['id'],
+                'title': trend.get('title', 'Untitled'),
+                'image': trend.get('image', '/static/images/default_trendy.png'),
+                'description': trend.get('description', ''),
+                'link': trend.get('link', ''),
+                'source': trend.get('source', 'Unknown'),
+                'timestamp': now
+            })
+            timestamp = now
+        elif timestamp.tzinfo is None:
+            timestamp = timestamp.replace(tzinfo=timezone.utc)
+        trend['timestamp'] = timestamp.isoformat()
+    if new_rows:
+        db.session.execute(sqlite_insert(Trend).on_conflict_do_nothing(index_elements=['id']), new_rows)
+    db.session.commit()
+    diff = snapshot_diff(trend_ids)
+    logger.debug(f"Synced trends: {len(new_rows)} inserted, {len(diff['added'])} added, {len(diff['retained'])} retained, {len(diff['dropped'])} dropped")
+    return diff
 
 def fetch_all_trends():
-    global global_trends, last_fetch_time
+    global last_fetch_time
     logger.debug("Starting fetch_all_trends")
     all_trends = []
     seen_ids = set()
-    funcs = [
-        get_hacker_news,
-        get_github_trending,
-        get_medium_technology,
-        get_stackoverflow_trending,
-        get_devto_latest,
-        get_lobsters,
-        get_slashdot,
-        get_wired,
-        get_steam_charts,
-        get_billboard_trending,
-        get_imdb_trending,
-        get_cnn_trending
-    ]
-    try:
-        existing_trends = {trend.id: trend for trend in Trend.query.all()}
-        logger.debug(f"Loaded {len(existing_trends)} existing trends")
-    except Exception as e:
-        logger.error(f"Error querying trends: {e}", exc_info=True)
-        existing_trends = {}
-
+    funcs = [source_registry[name] for name in ACTIVE_SOURCES if name in source_registry]
+    fetched = fetch_sources_concurrently(funcs)
     for func in funcs:
-        try:
-            trends = func()
-            if not trends or not isinstance(trends, list):
-                logger.warning(f"Source {func.__name__} returned invalid: {type(trends)}")
-                continue
-            all_trends.extend(trends)
-            logger.debug(f"Fetched {len(trends)} from {func.__name__}")
-        except Exception as e:
-            logger.error(f"Error in {func.__name__}: {e}", exc_info=True)
+        trends = fetched.get(func.__name__)
+        if not trends:
+            logger.warning(f"Source {func.__name__} returned nothing: {source_stats.get(func.__name__, {}).get('status')}")
+            continue
+        all_trends.extend(trends)
+        logger.debug(f"Fetched {len(trends)} from {func.__name__} in {source_stats[func.__name__]['latency']}s")
 
-    new_global_trends = []
     now = datetime.now(timezone.utc)
+    new_global_trends = []
     for trend in all_trends:
         trend_id = generate_stable_id(trend)
         if trend_id in seen_ids:
-            logger.warning(f"Skipping duplicate ID {trend_id}: {trend.get('title', 'Unknown')} (source: {trend.get('source', 'Unknown')})")
+            hot_logger.warning("Skipping duplicate ID %s: %s (source: %s)", trend_id, trend.get('title', 'Unknown'), trend.get('source', 'Unknown'))
             continue
         seen_ids.add(trend_id)
         trend['id'] = trend_id
-        existing_trend = existing_trends.get(trend_id)
-        if existing_trend:
-            logger.debug(f"Existing trend {trend_id}: {trend.get('title', 'Untitled')}, timestamp: {existing_trend.timestamp}")
-            timestamp = existing_trend.timestamp
-            if timestamp.tzinfo is None:
-                timestamp = timestamp.replace(tzinfo=timezone.utc)
-            trend['timestamp'] = timestamp.isoformat()
-            new_global_trends.append(trend)
-        else:
-            logger.debug(f"New trend {trend_id}: {trend.get('title', 'Untitled')}")
-            new_trend = Trend(
-                id=trend_id,
-                title=trend.get('title', 'Untitled'),
-                image=trend.get('image', '/static/images/default_trendy.png'),
-                description=trend.get('description', ''),
-                link=trend.get('link', ''),
-                source=trend.get('source', 'Unknown'),
-                timestamp=now
-            )
-            db.session.add(new_trend)
-            trend['timestamp'] = now.isoformat()
-            new_global_trends.append(trend)
+        new_global_trends.append(trend)
+
+    if DEDUP_ENABLED:
+        try:
+            started = time.perf_counter()
+            fetched_count = len(new_global_trends)
+            new_global_trends = merge_duplicates(new_global_trends)
+            logger.debug(f"Clustered {fetched_count} trends into {len(new_global_trends)} cards in {time.perf_counter() - started:.3f}s")
+        except Exception as e:
+            logger.error(f"Error merging duplicate trends: {e}", exc_info=True)
 
     try:
-        db.session.commit()
-        logger.debug("Database commit successful")
+        started = time.perf_counter()
+        tag_trends(new_global_trends)
+        logger.debug(f"Tagged {len(new_global_trends)} trends in {time.perf_counter() - started:.3f}s")
+    except Exception as e:
+        logger.error(f"Error tagging trends: {e}", exc_info=True)
+
+    try:
+        diff = sync_trends(new_global_trends, now)
     except Exception as e:
-        logger.error(f"Error committing database: {e}", exc_info=True)
+        logger.error(f"Error syncing trends: {e}", exc_info=True)
         db.session.rollback()
+        diff = None
+        for trend in new_global_trends:
+            trend.setdefault('timestamp', now.isoformat())
 
     try:
         cleanup_old_trends()
@@ -1069,11 +2412,347 @@ def fetch_all_trends():
         logger.error(f"Error sorting trends: {e}", exc_info=True)
         new_global_trends.sort(key=lambda x: x['timestamp'], reverse=True)
 
-    global_trends = new_global_trends[:2000]
+    publish_trends(new_global_trends[:2000], diff)
     last_fetch_time = now
     logger.debug(f"Total trends: {len(global_trends)}")
+
+    try:
+        enqueue_summaries(global_trends)
+    except Exception as e:
+        logger.error(f"Error queueing summaries: {e}", exc_info=True)
+
+    try:
+        home_variants(trend_snapshot)
+    except Exception as e:
+        logger.error(f"Error rendering home variants: {e}", exc_info=True)
+
+    try:
+        start_image_prefetch(global_trends)
+    except Exception as e:
+        logger.error(f"Error starting image prefetch: {e}", exc_info=True)
     return global_trends
 
+# ---------------------------- TRENDS API ---------------------------- #
+
+API_PAGE_SIZE = int(os.getenv('API_PAGE_SIZE', '30'))
+API_MAX_PAGE_SIZE = int(os.getenv('API_MAX_PAGE_SIZE', '200'))
+API_CACHE_SIZE = 256
+
+def encode_cursor(key):
+    timestamp, trend_id = key
+    raw = f"{timestamp.isoformat()}|{trend_id}".encode('utf-8')
+    return base64.urlsafe_b64encode(raw).decode('ascii').rstrip('=')
+
+def decode_cursor(cursor):
+    raw = base64.urlsafe_b64decode(cursor + '=' * (-len(cursor) % 4)).decode('utf-8')
+    timestamp, trend_id = raw.split('|', 1)
+    return (datetime.fromisoformat(timestamp).astimezone(timezone.utc), trend_id)
+
+def parse_since(value):
+    since = datetime.fromisoformat(value.replace('Z', '+00:00'))
+    if since.tzinfo is None:
+        since = since.replace(tzinfo=timezone.utc)
+    return since.astimezone(timezone.utc)
+
+def page_trends(snapshot, source, since, cursor, limit):
+    ordered, keys = snapshot['by_source'].get(source, ([], [])) if source else snapshot['ordered']
+    end = bisect.bisect_left(keys, cursor) if cursor else len(keys)
+    start = bisect.bisect_left(keys, (since, '')) if since else 0
+    first = max(start, end - limit)
+    items = ordered[first:end][::-1]
+    next_key = keys[first] if first > start else None
+    return items, next_key
+
+def api_response(snapshot, source, since, cursor, limit, fields):
+    cache_key = (source, since, cursor, limit, fields)
+    cache = snapshot['api_cache']
+    entry = cache.get(cache_key)
+    if entry:
+        return entry
+    items, next_key = page_trends(snapshot, source, since, cursor, limit)
+    if fields:
+        items = [{field: trend[field] for field in fields if field in trend} for trend in items]
+    body = json.dumps(items, ensure_ascii=False, separators=(',', ':')).encode('utf-8')
+    digest = hashlib.md5(body).hexdigest()
+    entry = {
+        'next_cursor': encode_cursor(next_key) if next_key else None,
+        'count': len(items),
+        'identity': (body, digest),
+        'gzip': (gzip.compress(body, compresslevel=6), f"{digest}-gz")
+    }
+    if brotli:
+        entry['br'] = (brotli.compress(body, quality=5), f"{digest}-br")
+    if len(cache) >= API_CACHE_SIZE:
+        cache.pop(next(iter(cache)))
+    cache[cache_key] = entry
+    return entry
+
+# ---------------------------- TREND PUSH ---------------------------- #
+
+# Home pages subscribe to the trends room and get one delta per published
+# snapshot: {generation, previous, added: [cards], removed: [ids]}. The last
+# TREND_DELTA_HISTORY deltas are kept so a client that reconnects with the
+# generation it last saw can catch up; anything older gets a reset instead.
+# A generation is a hash of the snapshot's ids, not a counter, so it means
+# the same on every worker: a page rendered by one worker either matches the
+# snapshot of the worker its socket reaches or gets a reset, never deltas
+# built from some other snapshot.
+# Deltas go through the message queue to every worker's clients. A page
+# applies one only if it starts at the page's generation; otherwise it asks
+# its own worker to catch it up, which is a no-op when both hold the same
+# snapshot. Resets stay with the worker whose delta history broke.
+TRENDS_ROOM = 'trends'
+TREND_DELTA_HISTORY = int(os.getenv('TREND_DELTA_HISTORY', '50'))
+TREND_CARD_FIELDS = ('id', 'title', 'image', 'link', 'source', 'source_class', 'mood_tags', 'timestamp')
+trend_deltas = deque(maxlen=TREND_DELTA_HISTORY)
+
+def trend_card(trend):
+    card = {field: trend.get(field) for field in TREND_CARD_FIELDS}
+    card['image'] = thumb_url(card['image'])
+    card['timestamp'] = utc_timestamp(card['timestamp'])
+    return card
+
+def push_trend_delta(snapshot, previous_generation):
+    diff = snapshot['diff']
+    if snapshot['generation'] == previous_generation:
+        return None
+    if diff is None:
+        # Published without a diff (e.g. reloaded from the database), so
+        # older deltas no longer chain up to this generation
+        trend_deltas.clear()
+        socketio.emit('trends_reset', {'generation': snapshot['generation']}, to=TRENDS_ROOM, ignore_queue=True)
+        return None
+    by_id = snapshot['by_id']
+    delta = {
+        'generation': snapshot['generation'],
+        'previous': previous_generation,
+        'added': [trend_card(by_id[trend_id]) for trend_id in diff['added'] if trend_id in by_id],
+        'removed': diff['dropped']
+    }
+    trend_deltas.append(delta)
+    socketio.emit('trends', delta, to=TRENDS_ROOM)
+    logger.debug(f"Pushed generation {delta['generation']}: {len(delta['added'])} added, {len(delta['removed'])} removed")
+    return delta
+
+def trend_deltas_since(generation):
+    if generation == trend_generation:
+        return []
+    # Walk back to the latest delta that starts where the client is; ids can
+    # come back, so the same generation may appear more than once
+    deltas = []
+    for delta in reversed(list(trend_deltas)):
+        deltas.append(delta)
+        if delta['previous'] == generation:
+            return deltas[::-1]
+    return None
+
+# ---------------------------- CHAT HISTORY ---------------------------- #
+
+# Every trend id is a chat room, so history is kept per room in a bounded
+# buffer and all rooms share one byte budget; the rooms that have been idle
+# longest are dropped first when it runs out. With CHAT_HISTORY_PERSIST=1
+# messages are also written to SQLite and a room that was evicted (or never
+# loaded in this worker) is read back from there on join.
+# A message reaches one worker, but the join that asks for history may land
+# on another, so with a message queue every message is also sent as an
+# internal event to CHAT_HISTORY_ROOM, which no client joins. It is listed
+# in queue_event_handlers, so every worker, the sender included, files it in
+# its own buffer instead of emitting it. A worker that starts
+# later only has what arrived since, plus SQLite when persistence is on.
+CHAT_HISTORY_SIZE = int(os.getenv('CHAT_HISTORY_SIZE', '50'))
+CHAT_HISTORY_BUDGET = int(os.getenv('CHAT_HISTORY_BUDGET', str(4 * 1024 * 1024)))
+CHAT_HISTORY_PERSIST = os.getenv('CHAT_HISTORY_PERSIST') == '1'
+CHAT_MESSAGE_OVERHEAD = 120
+CHAT_HISTORY_EVENT = 'chat_history'
+CHAT_HISTORY_ROOM = '__chat_history__'
+chat_history = OrderedDict()
+chat_history_bytes = 0
+chat_lock = threading.Lock()
+
+def message_size(text):
+    return len(text.encode('utf-8')) + CHAT_MESSAGE_OVERHEAD
+
+def store_messages(room, texts):
+    global chat_history_bytes
+    with chat_lock:
+        buffer = chat_history.get(room)
+        if buffer is None:
+            buffer = chat_history[room] = deque()
+        chat_history.move_to_end(room)
+        for text in texts:
+            buffer.append(text)
+            chat_history_bytes += message_size(text)
+        while len(buffer) > CHAT_HISTORY_SIZE:
+            chat_history_bytes -= message_size(buffer.popleft())
+        while chat_history_bytes > CHAT_HISTORY_BUDGET and len(chat_history) > 1:
+            evicted_room, evicted = chat_history.popitem(last=False)
+            chat_history_bytes -= sum(message_size(text) for text in evicted)
+            hot_logger.debug("Evicted chat history for idle room %s", evicted_room)
+
+def queued_history():
+    return isinstance(socketio.server.manager, WorkerEventsMixin)
+
+def file_queued_message(entry):
+    room = entry['room']
+    # A worker that never loaded the room reads it all back from SQLite on
+    # the next join; starting a buffer here would hide the older rows
+    if CHAT_HISTORY_PERSIST and room not in chat_history:
+        return
+    store_messages(room, [entry['text']])
+
+queue_event_handlers[CHAT_HISTORY_EVENT] = file_queued_message
+
+def remember_message(room, text):
+    if CHAT_HISTORY_PERSIST:
+        try:
+            db.session.add(ChatMessage(room=room, text=text))
+            db.session.commit()
+        except Exception as e:
+            logger.error(f"Error saving chat message for room {room}: {e}", exc_info=True)
+            db.session.rollback()
+    if queued_history():
+        socketio.emit(CHAT_HISTORY_EVENT, {'room': room, 'text': text}, to=CHAT_HISTORY_ROOM)
+    else:
+        store_messages(room, [text])
+
+def room_history(room):
+    with chat_lock:
+        buffer = chat_history.get(room)
+        if buffer is not None:
+            chat_history.move_to_end(room)
+            return list(buffer)
+    if not CHAT_HISTORY_PERSIST:
+        return []
+    try:
+        rows = ChatMessage.query.filter_by(room=room).order_by(ChatMessage.id.desc()).limit(CHAT_HISTORY_SIZE).all()
+    except Exception as e:
+        logger.error(f"Error loading chat history for room {room}: {e}", exc_info=True)
+        return []
+    texts = [row.text for row in reversed(rows)]
+    if texts:
+        store_messages(room, texts)
+    return texts
+
+# ---------------------------- RATE LIMITS ---------------------------- #
+
+# Token buckets per action, keyed by Socket.IO sid and by client IP; an event
+# has to find a token in every bucket it is charged to. RATE_LIMIT_<ACTION>
+# is "tokens per second,burst". A bucket that has been idle long enough to
+# refill is the same as no bucket, so the sweep simply drops those.
+def parse_rate_limit(action, default):
+    rate, burst = os.getenv(f'RATE_LIMIT_{action.upper()}', default).split(',')
+    return float(rate), float(burst)
+
+RATE_LIMITS = {
+    'message': parse_rate_limit('message', '0.5,5'),
+    'join': parse_rate_limit('join', '0.5,10'),
+    'vote': parse_rate_limit('vote', '1,10')
+}
+RATE_LIMIT_SWEEP = float(os.getenv('RATE_LIMIT_SWEEP', '60'))
+rate_buckets = {}
+rate_lock = threading.Lock()
+rate_last_sweep = time.monotonic()
+throttle_counts = Counter()
+
+def sweep_rate_buckets(now):
+    global rate_last_sweep
+    rate_last_sweep = now
+    idle = [key for key, (tokens, updated) in rate_buckets.items()
+            if now - updated >= RATE_LIMITS[key[0]][1] / RATE_LIMITS[key[0]][0]]
+    for key in idle:
+        del rate_buckets[key]
+    logger.debug(f"Swept {len(idle)} idle rate buckets, {len(rate_buckets)} left")
+
+def allow_event(action, *keys):
+    rate, burst = RATE_LIMITS[action]
+    now = time.monotonic()
+    with rate_lock:
+        if now - rate_last_sweep >= RATE_LIMIT_SWEEP:
+            sweep_rate_buckets(now)
+        buckets = []
+        for key in keys:
+            tokens, updated = rate_buckets.get((action, key), (burst, now))
+            tokens = min(burst, tokens + (now - updated) * rate)
+            if tokens < 1:
+                throttle_counts[action] += 1
+                return False
+            buckets.append(((action, key), tokens))
+        for bucket_key, tokens in buckets:
+            rate_buckets[bucket_key] = (tokens - 1, now)
+    return True
+
+def retry_after(action):
+    return max(1, math.ceil(1 / RATE_LIMITS[action][0]))
+
+def forget_sid(sid):
+    with rate_lock:
+        for action in RATE_LIMITS:
+            rate_buckets.pop((action, sid), None)
+
+# ---------------------------- HOME RENDER CACHE ---------------------------- #
+
+# Each snapshot renders the first page of the home page once per shuffle
+# seed; requests pick one of the stored variants and further pages come from
+# /trends/page in the same variant order. Vote counts are filled in by the
+# page from /api/votes so they never go stale inside the cached HTML.
+HOME_VARIANTS = int(os.getenv('HOME_VARIANTS', '4'))
+HOME_PAGE_SIZE = int(os.getenv('HOME_PAGE_SIZE', '30'))
+PAGE_CACHE_SIZE = 256
+VOTE_COUNTS_TTL = float(os.getenv('VOTE_COUNTS_TTL', '5'))
+home_render_lock = threading.Lock()
+
+def home_page(snapshot, variant, offset, sources, limit=None):
+    limit = limit or HOME_PAGE_SIZE
+    order = snapshot['variants'][variant]
+    if sources:
+        position = order['position']
+        matched = {trend['id']: trend for source in sources for trend in snapshot['by_source'].get(source, ([], []))[0]}
+        matched = sorted(matched.values(), key=lambda trend: position[trend['id']])
+    else:
+        matched = order['trends']
+    page = matched[offset:offset + limit]
+    next_offset = offset + limit if offset + limit < len(matched) else None
+    return page, next_offset
+
+def home_variants(snapshot):
+    today = date.today().isoformat()
+    cached = snapshot.get('home')
+    if cached and cached[0] == today:
+        return cached[1]
+    with home_render_lock:
+        cached = snapshot.get('home')
+        if cached and cached[0] == today:
+            return cached[1]
+        started = time.perf_counter()
+        trend_of_the_day = get_trend_of_the_day(snapshot['ordered'][0][::-1])
+        unique_sources = sorted(snapshot['by_source'])
+        variants = []
+        for variant in range(len(snapshot['variants'])):
+            page, next_offset = home_page(snapshot, variant, 0, None)
+            body = render_template(
+                'index.html',
+                trends=page,
+                trend_of_the_day=trend_of_the_day,
+                unique_sources=unique_sources,
+                vote_counts={},
+                variant=variant,
+                next_offset=next_offset,
+                generation=snapshot['generation']
+            ).encode('utf-8')
+            variants.append((body, hashlib.md5(body).hexdigest()))
+        snapshot['home'] = (today, variants)
+        logger.debug(f"Rendered {len(variants)} home variants for generation {snapshot['generation']} in {time.perf_counter() - started:.2f}s")
+        return variants
+
+def snapshot_vote_counts(snapshot):
+    cached = snapshot.get('vote_counts')
+    now = time.monotonic()
+    if cached and now - cached[0] < VOTE_COUNTS_TTL:
+        return cached[1]
+    counts = get_vote_counts(snapshot['by_id'])
+    snapshot['vote_counts'] = (now, counts)
+    return counts
+
 def background_fetch():
     logger.debug("Background fetch started")
     while True:
@@ -1085,66 +2764,134 @@ def background_fetch():
             logger.error(f"Background fetch error: {e}", exc_info=True)
         time.sleep(600)
 
+def warm_up_model():
+    if not SUMMARIES_ENABLED:
+        return
+    if MODEL_SERVER == 'off':
+        get_summarizer()
+    elif MODEL_SERVER == 'spawn':
+        start_model_server()
+
+def fetch_thread_running():
+    return background_fetch_thread is not None and background_fetch_thread.is_alive()
+
+background_fetch_thread = None
 if os.getenv('RENDER'):
-    threading.Thread(target=background_fetch, daemon=True).start()
+    background_fetch_thread = threading.Thread(target=background_fetch, daemon=True)
+    background_fetch_thread.start()
     logger.debug("Background fetch thread started")
 
+if os.getenv('MODEL_WARMUP') == '1':
+    threading.Thread(target=warm_up_model, daemon=True).start()
+
 @app.route('/')
 def home():
-    global global_trends, last_fetch_time
-    logger.debug("Rendering home")
+    global last_fetch_time
+    hot_logger.debug("Rendering home")
     now = datetime.now(timezone.utc)
-    if not global_trends or (last_fetch_time and (now - last_fetch_time).total_seconds() > 300):
-        logger.debug("Fetching trends: empty or stale")
+    # A worker with a fetch thread publishes its own results; reloading the
+    # table under it would replace the merged fetch with raw rows
+    stale = last_fetch_time and (now - last_fetch_time).total_seconds() > 300
+    if not global_trends or (stale and not fetch_thread_running()):
+        logger.debug("Loading trends: empty or stale")
         try:
             with app.app_context():
-                trends = Trend.query.order_by(Trend.timestamp.desc()).limit(2000).all()
-            logger.debug(f"Loaded {len(trends)} trends from database")
-            global_trends = [{
-                'id': t.id,
-                'title': t.title,
-                'image': t.image,
-                'description': t.description,
-                'link': t.link,
-                'source': t.source,
-                'source_class': t.source,
-                'timestamp': t.timestamp.isoformat() if t.timestamp.tzinfo else t.timestamp.replace(tzinfo=timezone.utc).isoformat(),
-                'video': None
-            } for t in trends]
+                load_trends_from_db()
             last_fetch_time = now
         except Exception as e:
             logger.error(f"Error loading trends: {e}", exc_info=True)
             with app.app_context():
                 fetch_all_trends()
     else:
-        logger.debug("Using cached trends")
+        hot_logger.debug("Using cached trends")
 
-    trends = global_trends
-    if not trends:
+    snapshot = trend_snapshot
+    if not snapshot['trends']:
         logger.warning("No trends available")
-        trends = []
-
-    random.shuffle(trends)
-    trend_of_the_day = get_trend_of_the_day(trends)
-    unique_sources = sorted(set(trend['source'] for trend in trends))
-    vote_counts = db.session.query(
-        Vote.trend_id,
-        Vote.vote_type,
-        db.func.count().label('count')
-    ).group_by(Vote.trend_id, Vote.vote_type).all()
-    vote_counts_dict = {}
-    for v in vote_counts:
-        if v.trend_id not in vote_counts_dict:
-            vote_counts_dict[v.trend_id] = {}
-        vote_counts_dict[v.trend_id][v.vote_type] = v.count
-    logger.debug(f"Rendering {len(trends)} trends, sources: {unique_sources}")
-    return render_template(
-        'index.html',
-        trends=trends,
-        trend_of_the_day=trend_of_the_day,
-        unique_sources=unique_sources,
-        vote_counts=vote_counts_dict
-    )
+    variants = home_variants(snapshot)
+    # Any variant of the current generation is as good as a fresh one
+    cached_etag = next((etag for _, etag in variants if request.if_none_match.contains(etag)), None)
+    if cached_etag:
+        response = make_response('', 304)
+        response.set_etag(cached_etag)
+    else:
+        body, etag = random.choice(variants)
+        response = make_response(body)
+        response.set_etag(etag)
+    response.headers['Cache-Control'] = 'no-cache'
+    return response
+
+@app.route('/trends/page')
+def trends_page():
+    snapshot = trend_snapshot
+    try:
+        variant = int(request.args.get('variant', 0)) % len(snapshot['variants'])
+        offset = max(0, int(request.args.get('offset', 0)))
+    except ValueError:
+        return jsonify({'error': 'Invalid variant or offset'}), 400
+    sources = tuple(sorted(set(request.args.getlist('source')))) or None
+    cache_key = (variant, offset, sources)
+    cache = snapshot['page_cache']
+    entry = cache.get(cache_key)
+    if entry is None:
+        page, next_offset = home_page(snapshot, variant, offset, sources)
+        body = render_template('sections/trend_cards.html', trends=page, vote_counts={}).encode('utf-8')
+        entry = (body, next_offset)
+        if len(cache) >= PAGE_CACHE_SIZE:
+            cache.pop(next(iter(cache)))
+        cache[cache_key] = entry
+    body, next_offset = entry
+    response = make_response(body)
+    response.headers['X-Next-Offset'] = '' if next_offset is None else str(next_offset)
+    response.headers['X-Generation'] = snapshot['generation']
+    response.headers['Cache-Control'] = 'no-cache'
+    return response
+
+@app.route('/assets/<path:filename>')
+def assets(filename):
+    mimetype = mimetypes.guess_type(filename)[0] or 'application/octet-stream'
+    accepted = request.headers.get('Accept-Encoding', '')
+    encoding = None
+    for name, suffix in (('br', '.br'), ('gzip', '.gz')):
+        path = safe_join(ASSET_DIR, filename + suffix)
+        if name in accepted and path and os.path.exists(path):
+            encoding = name
+            filename += suffix
+            break
+    response = send_from_directory(ASSET_DIR, filename, mimetype=mimetype, max_age=ASSET_MAX_AGE)
+    if encoding:
+        response.headers['Content-Encoding'] = encoding
+    response.headers['Cache-Control'] = f'public, max-age={ASSET_MAX_AGE}, immutable'
+    response.headers['Vary'] = 'Accept-Encoding'
+    return response
+
+@app.route('/img/<name>')
+def image_proxy(name):
+    key, _, width = name.rpartition('-')
+    if not width.isdigit() or int(width) not in THUMB_WIDTHS:
+        return jsonify({'error': 'Unknown image size'}), 404
+    entry = get_image(key, int(width), image_format(request.headers.get('Accept', '')))
+    response = None
+    if entry is not None:
+        blob, mimetype, _ = entry
+        try:
+            response = send_from_directory(IMAGE_CACHE_DIR, blob, mimetype=mimetype, max_age=7 * 86400)
+        except NotFound:
+            pass  # evicted by another worker since the lookup
+    if response is None:
+        # Not cached and not fetchable right now: let the browser try the source
+        return redirect(image_source(key) or url_for('static', filename='images/default_trendy.png'))
+    response.headers['Vary'] = 'Accept'
+    return response
+
+@app.route('/api/votes')
+def api_votes():
+    snapshot = trend_snapshot
+    ids = request.args.get('ids')
+    if ids:
+        trend_ids = [trend_id for trend_id in ids.split(',') if trend_id][:500]
+        return jsonify(get_vote_counts(trend_ids))
+    return jsonify(snapshot_vote_counts(snapshot))
 
 @app.route('/chat')
 def chat():
@@ -1152,15 +2899,47 @@ def chat():
 
 @app.route('/api/trends')
 def api_trends():
-    logger.debug("Serving /api/trends")
-    return jsonify(global_trends[:2000])
+    snapshot = trend_snapshot
+    source = request.args.get('source') or None
+    fields = request.args.get('fields')
+    fields = tuple(f.strip() for f in fields.split(',') if f.strip()) if fields else None
+    try:
+        limit = min(API_MAX_PAGE_SIZE, max(1, int(request.args.get('limit', API_PAGE_SIZE))))
+        since = parse_since(request.args['since']) if request.args.get('since') else None
+        cursor = decode_cursor(request.args['cursor']) if request.args.get('cursor') else None
+    except (ValueError, UnicodeDecodeError) as e:
+        hot_logger.warning("Bad /api/trends query %s: %s", request.query_string, e)
+        return jsonify({'error': 'Invalid limit, since or cursor'}), 400
+    entry = api_response(snapshot, source, since, cursor, limit, fields)
+    encoding = 'identity'
+    if 'br' in entry and 'br' in request.accept_encodings:
+        encoding = 'br'
+    elif 'gzip' in request.accept_encodings:
+        encoding = 'gzip'
+    body, etag = entry[encoding]
+    if request.if_none_match.contains(etag):
+        response = make_response('', 304)
+    else:
+        response = make_response(body)
+        response.headers['Content-Type'] = 'application/json'
+        if encoding != 'identity':
+            response.headers['Content-Encoding'] = encoding
+    response.set_etag(etag)
+    response.headers['Vary'] = 'Accept-Encoding'
+    response.headers['Cache-Control'] = 'public, max-age=60'
+    if entry['next_cursor']:
+        args = request.args.to_dict()
+        args['cursor'] = entry['next_cursor']
+        response.headers['X-Next-Cursor'] = entry['next_cursor']
+        response.headers['Link'] = f'<{url_for("api_trends", **args)}>; rel="next"'
+    return response
 
 @app.route('/trend/<trend_id>')
 def trend_detail(trend_id):
-    logger.debug(f"Rendering trend {trend_id}")
-    trend = next((t for t in global_trends if t['id'] == trend_id), None)
+    hot_logger.debug("Rendering trend %s", trend_id)
+    trend = find_trend(trend_id)
     if not trend:
-        logger.warning(f"Trend not found: {trend_id}")
+        hot_logger.warning("Trend not found: %s", trend_id)
         try:
             return render_template('404.html'), 404
         except Exception as e:
@@ -1168,12 +2947,11 @@ def trend_detail(trend_id):
             response = make_response("Trend not found", 404)
             response.headers['Content-Type'] = 'text/plain'
             return response
-    summary = generate_summary(trend)
-    vote_counts = db.session.query(
-        Vote.vote_type,
-        db.func.count().label('count')
-    ).filter_by(trend_id=trend_id).group_by(Vote.vote_type).all()
-    vote_counts_dict = {v.vote_type: v.count for v in vote_counts}
+    summary = get_stored_summary(trend)
+    if not summary:
+        summary = fallback_summary(trend)
+        enqueue_summaries([trend])
+    vote_counts_dict = get_vote_counts([trend_id]).get(trend_id, {})
     return render_template(
         'trend_detail.html',
         trend=trend,
@@ -1183,32 +2961,24 @@ def trend_detail(trend_id):
 
 @app.route('/api/vote', methods=['POST'])
 def vote():
-    logger.debug("Processing vote")
+    hot_logger.debug("Processing vote")
     data = request.json
     trend_id = data.get('trend_id')
     vote_type = data.get('vote_type')
     ip = request.remote_addr
+    if not allow_event('vote', ip):
+        hot_logger.warning("Throttled vote from %s", ip)
+        response = jsonify({'error': 'Too many votes, slow down'})
+        response.headers['Retry-After'] = str(retry_after('vote'))
+        return response, 429
     if not trend_id or not vote_type:
         logger.error(f"Missing vote data: {data}")
         return jsonify({'error': 'Missing trend_id or vote_type'}), 400
-    existing_vote = Vote.query.filter_by(trend_id=trend_id, ip_address=ip).first()
-    if existing_vote:
-        logger.warning(f"Duplicate vote from {ip} for {trend_id}")
+    if not accept_vote(trend_id, ip, vote_type):
+        hot_logger.warning("Duplicate vote from %s for %s", ip, trend_id)
         return jsonify({'error': 'Already voted'}), 403
-    vote = Vote(trend_id=trend_id, ip_address=ip, vote_type=vote_type)
-    db.session.add(vote)
-    try:
-        db.session.commit()
-        logger.debug(f"Vote recorded: {trend_id}, {vote_type}")
-    except Exception as e:
-        logger.error(f"Error committing vote: {e}", exc_info=True)
-        db.session.rollback()
-        return jsonify({'error': 'Database error'}), 500
-    vote_counts = db.session.query(
-        Vote.vote_type,
-        db.func.count().label('count')
-    ).filter_by(trend_id=trend_id).group_by(Vote.vote_type).all()
-    return jsonify({v.vote_type: v.count for v in vote_counts})
+    hot_logger.debug("Vote queued: %s, %s", trend_id, vote_type)
+    return jsonify(get_vote_counts([trend_id]).get(trend_id, {}))
 
 @app.route('/fetch-trends')
 def fetch_trends():
@@ -1241,12 +3011,13 @@ def test_vote():
         vote = Vote.query.filter_by(trend_id=test_trend_id, ip_address=test_ip).first()
         if not vote:
             vote = Vote(
-                test_trend_id,
+                trend_id=test_trend_id,
                 ip_address=test_ip,
                 vote_type="upvote",
                 timestamp=datetime.now(timezone.utc)
             )
             db.session.add(vote)
+            bump_vote_count(test_trend_id, "upvote")
             db.session.commit()
             logger.debug("Test vote inserted")
         vote_count = Vote.query.count()
@@ -1259,7 +3030,7 @@ def test_vote():
 
 @app.route('/debug-request')
 def debug_request():
-    logger.debug(f"Request: {request.host}, {request.url}")
+    hot_logger.debug("Request: %s, %s", request.host, request.url)
     return jsonify({"host": request.host, "url": request.url})
 
 @app.route('/debug-rooms')
@@ -1275,37 +3046,105 @@ def debug_rooms():
         logger.error(f"Error fetching rooms: {e}", exc_info=True)
         return jsonify({"status": "error", "message": str(e)}), 500
 
+@app.route('/debug-sources')
+def debug_sources():
+    return jsonify({"status": "success", "deadline": FETCH_DEADLINE, "sources": source_stats})
+
+@app.route('/metrics')
+def metrics():
+    response = make_response(render_metrics())
+    response.headers['Content-Type'] = 'text/plain; version=0.0.4; charset=utf-8'
+    return response
+
+@app.route('/debug-rate-limits')
+def debug_rate_limits():
+    return jsonify({
+        "status": "success",
+        "limits": {action: {"rate": rate, "burst": burst} for action, (rate, burst) in RATE_LIMITS.items()},
+        "buckets": len(rate_buckets),
+        "throttled": dict(throttle_counts)
+    })
+
+@app.route('/debug-startup')
+def debug_startup():
+    try:
+        table_counts = {"trend": Trend.query.count(), "vote": Vote.query.count()}
+    except Exception as e:
+        logger.error(f"Error counting tables: {e}", exc_info=True)
+        table_counts = {}
+    return jsonify({
+        "status": "success",
+        "mode": STARTUP_MODE,
+        "model_server": MODEL_SERVER,
+        "summarizer_loaded": summarizer is not None,
+        "summarizer_error": summarizer_error,
+        "timings": dict(startup_timings),
+        "total": round(sum(t for _, t in startup_timings), 4),
+        "table_counts": table_counts
+    })
+
+@app.route('/debug-query-plans')
+def debug_query_plans():
+    try:
+        return jsonify({"status": "success", "plans": explain_hot_queries()})
+    except Exception as e:
+        logger.error(f"Error explaining queries: {e}", exc_info=True)
+        return jsonify({"status": "error", "message": str(e)}), 500
+
 @socketio.on('connect')
 def handle_connect():
-    logger.debug(f"Client connected: {request.sid}")
+    hot_logger.debug("Client connected: %s", request.sid)
+    SOCKET_CONNECTIONS.inc()
 
 @socketio.on('disconnect')
 def handle_disconnect():
-    logger.debug(f"Client disconnected: {request.sid}")
+    hot_logger.debug("Client disconnected: %s", request.sid)
+    SOCKET_CONNECTIONS.dec()
+    forget_sid(request.sid)
+
+@socketio.on('subscribe_trends')
+def handle_subscribe_trends(data):
+    join_room(TRENDS_ROOM)
+    generation = (data or {}).get('generation')
+    deltas = trend_deltas_since(generation) if isinstance(generation, str) else None
+    if deltas is None:
+        hot_logger.debug("Client %s resuming from %s, sending reset to %s", request.sid, generation, trend_generation)
+        emit('trends_reset', {'generation': trend_generation}, to=request.sid)
+        return
+    hot_logger.debug("Client %s resuming from %s with %d deltas", request.sid, generation, len(deltas))
+    for delta in deltas:
+        emit('trends', delta, to=request.sid)
 
 @socketio.on('join')
 def handle_join(data):
     room = data.get('room')
     username = data.get('username', 'Guest')
-    if not room or not isinstance(room, str):
+    if not room or not isinstance(room, str) or room == TRENDS_ROOM:
         logger.error(f"Invalid room in join: {room}")
         emit('error', {'message': 'Invalid room'}, to=request.sid)
         return
+    if not allow_event('join', request.sid, request.remote_addr):
+        hot_logger.warning("Throttled join from %s (SID: %s) to room %s", username, request.sid, room)
+        emit('error', {'message': 'Too many rooms joined, slow down'}, to=request.sid)
+        return
     join_room(room)
-    current_rooms = rooms(sid=request.sid)
-    logger.debug(f"User {username} (SID: {request.sid}) joined room {room}. Current rooms: {current_rooms}")
+    if hot_logger.isEnabledFor(logging.DEBUG):
+        hot_logger.debug("User %s (SID: %s) joined room %s. Current rooms: %s", username, request.sid, room, rooms(sid=request.sid))
+    history = room_history(room)
+    if history:
+        emit('history', history, to=request.sid)
     emit('message', f"{username} entered chat.", room=room, include_self=True)
 
 @socketio.on('leave')
 def handle_leave(data):
     room = data.get('room')
     username = data.get('username', 'Guest')
-    if not room or not isinstance(room, str):
+    if not room or not isinstance(room, str) or room == TRENDS_ROOM:
         logger.error(f"Invalid room in leave: {room}")
         emit('error', {'message': 'Invalid room'}, to=request.sid)
         return
     leave_room(room)
-    logger.debug(f"User {username} (SID: {request.sid}) left room {room}")
+    hot_logger.debug("User %s (SID: %s) left room %s", username, request.sid, room)
     emit('message', f"{username} left chat.", room=room, include_self=False)
 
 @socketio.on('message')
@@ -1313,17 +3152,25 @@ def handle_message(data):
     room = data.get('room')
     username = data.get('username', 'Guest')
     message = data.get('message', '').strip()
-    if not room or not isinstance(room, str):
+    if not room or not isinstance(room, str) or room == TRENDS_ROOM:
         logger.error(f"Invalid room in message: {room}")
         emit('error', {'message': 'Invalid room'}, to=request.sid)
         return
     if not message or len(message) > 200:
-        logger.warning(f"Invalid message from {username} in room {room}: {message}")
+        hot_logger.warning("Invalid message from %s in room %s: %r", username, room, message)
         emit('error', {'message': 'Message empty or too long'}, to=request.sid)
         return
+    if not allow_event('message', request.sid, request.remote_addr):
+        hot_logger.warning("Throttled message from %s (SID: %s) in room %s", username, request.sid, room)
+        emit('error', {'message': 'Too many messages, slow down'}, to=request.sid)
+        return
     msg = f"{username}: {message}"
-    logger.debug(f"Broadcasting message: {msg} in room {room} (SID: {request.sid})")
+    hot_logger.debug("Broadcasting message: %s in room %s (SID: %s)", msg, room, request.sid)
     emit('message', msg, room=room, include_self=True)
+    remember_message(room, msg)
+
+mark_startup('routes')
+logger.info(f"Startup ({STARTUP_MODE}) took {sum(t for _, t in startup_timings):.3f}s: {dict(startup_timings)}")
 
 if __name__ == '__main__':
     logger.info("Starting local app")
@@ -0,0 +1,276 @@
+import argparse
+import atexit
+import gc
+import json
+import os
+import platform
+import shutil
+import sys
+import tempfile
+import time
+import tracemalloc
+
+# Offline benchmark for the scrapers in app.py. Every source has a saved page
+# (or API response) in fixtures/; nothing is fetched. For each source, parser
+# backend and input size it reports:
+#   parse    building the soup (or json.loads for the API sources)
+#   total    parse_source end to end: parse, select items, normalize them
+#            and give them stable IDs
+#   tag      tag_trends, the mood and keyword pass run once per fetch
+# plus items per second over the whole pipeline and the tracemalloc peak.
+# The peak only counts Python allocations; libxml2's own buffers are not
+# seen. Sizes repeat the block between <!-- repeat --> markers (or the item
+# list in the JSON fixtures), and the item limit is lifted so larger pages
+# yield more items.
+#
+#   python benchmarks/parse_benchmark.py                   # compare with baseline.json
+#   python benchmarks/parse_benchmark.py --save-baseline   # record a new baseline
+#   python benchmarks/parse_benchmark.py --sources get_cnn_trending --parsers lxml --sizes 1,32
+#
+# Exits 1 when a case returns a different number of items than the baseline
+# did or its peak memory grows by more than --tolerance; both are exact from
+# run to run. Throughput depends on the machine and on whatever else it is
+# doing, so a case that comes in slower than the tolerance allows is measured
+# again (--confirm times) and only the best run counts. What is still slow
+# is reported, and fails the run only with --strict-timing, which makes sense
+# against a baseline recorded on the same quiet machine.
+
+HERE = os.path.dirname(os.path.abspath(__file__))
+FIXTURES = os.path.join(HERE, 'fixtures')
+BASELINE = os.path.join(HERE, 'baseline.json')
+REPEAT_START = '<!-- repeat -->'
+REPEAT_END = '<!-- /repeat -->'
+HTML_PARSERS = ('lxml', 'html.parser', 'html5lib')
+
+# Importing app opens its database and builds the static assets; keep both
+# in a scratch directory and leave out the fetch thread and the queue
+SCRATCH = tempfile.mkdtemp(prefix='parse-benchmark-')
+atexit.register(shutil.rmtree, SCRATCH, ignore_errors=True)
+os.environ.update(DATABASE_PATH=os.path.join(SCRATCH, 'trendy.db'), ASSET_DIR=os.path.join(SCRATCH, 'assets'))
+for name in ('RENDER', 'MESSAGE_QUEUE', 'MODEL_WARMUP'):
+    os.environ.pop(name, None)
+sys.path.insert(0, os.path.dirname(HERE))
+os.environ.setdefault('STARTUP_MODE', 'slim')
+os.environ.setdefault('LOG_LEVEL', 'WARNING')
+import app  # noqa: E402
+from bs4 import BeautifulSoup, FeatureNotFound  # noqa: E402
+
+# API sources: parse function and the path to the list that gets repeated
+JSON_SOURCES = {
+    'get_reddit_top': (app.parse_reddit, ('data', 'children')),
+    'get_youtube_trending': (app.parse_youtube, ('items',))
+}
+
+def available_parsers():
+    parsers = []
+    for parser in HTML_PARSERS:
+        try:
+            BeautifulSoup('<p></p>', parser)
+            parsers.append(parser)
+        except FeatureNotFound:
+            pass
+    return parsers
+
+def read_fixture(name):
+    for ext in ('html', 'xml', 'json'):
+        path = os.path.join(FIXTURES, f'{name}.{ext}')
+        if os.path.exists(path):
+            with open(path, encoding='utf-8') as f:
+                return f.read()
+    return None
+
+def scale_markup(markup, size):
+    start = markup.find(REPEAT_START)
+    end = markup.find(REPEAT_END)
+    if size == 1 or start < 0 or end < 0:
+        return markup
+    block = markup[start + len(REPEAT_START):end]
+    return markup[:start] + block * size + markup[end:]
+
+def scale_json(text, path, size):
+    data = json.loads(text)
+    node = data
+    for key in path[:-1]:
+        node = node[key]
+    node[path[-1]] = node[path[-1]] * size
+    return json.dumps(data)
+
+def build_cases(sources, parsers, sizes):
+    cases = []
+    for name in sources:
+        fixture = read_fixture(name)
+        if fixture is None:
+            print(f"skipping {name}: no fixture", file=sys.stderr)
+            continue
+        if name in JSON_SOURCES:
+            path = JSON_SOURCES[name][1]
+            for size in sizes:
+                cases.append((name, 'json', size, scale_json(fixture, path, size), None))
+            continue
+        spec = app.source_registry[name].spec
+        backends = [spec['parser']] if spec.get('parser') else parsers
+        for backend in backends:
+            if backend == 'xml' and 'lxml' not in parsers:
+                print(f"skipping {name}: the xml backend needs lxml", file=sys.stderr)
+                continue
+            for size in sizes:
+                markup = scale_markup(fixture, size)
+                if backend == 'xml':
+                    markup = markup.encode('utf-8')  # scrape_source hands XML over as bytes
+                cases.append((name, backend, size, markup, spec))
+    return cases
+
+def best_of(func, repeat, min_time):
+    # Like timeit: the best of at least `repeat` runs, more for small inputs
+    # until min_time has passed, with the collector off so a GC pass over
+    # the previous soup does not land in this one
+    best = float('inf')
+    result = None
+    runs = 0
+    gc.collect()
+    gc.disable()
+    try:
+        deadline = time.perf_counter() + min_time
+        while runs < repeat or time.perf_counter() < deadline:
+            started = time.perf_counter()
+            result = func()
+            best = min(best, time.perf_counter() - started)
+            runs += 1
+    finally:
+        gc.enable()
+    return best, result
+
+def run_case(name, backend, size, markup, spec, repeat, min_time):
+    if spec is None:
+        parse_json = JSON_SOURCES[name][0]
+        build = lambda: json.loads(markup)
+        extract = lambda: parse_json(json.loads(markup), limit=sys.maxsize)
+    else:
+        unlimited = dict(spec, limit=sys.maxsize)
+        strain = spec.get('strain')
+        build = lambda: BeautifulSoup(markup, backend, parse_only=app.spec_strainer(strain) if strain else None)
+        extract = lambda: app.parse_source(unlimited, markup, backend)
+    extract()  # warm up selector and regex caches
+    parse_time, _ = best_of(build, repeat, min_time)
+    total_time, results = best_of(extract, repeat, min_time)
+    tag_time, _ = best_of(lambda: app.tag_trends(results), repeat, min_time)
+    tracemalloc.start()
+    app.tag_trends(extract())
+    peak = tracemalloc.get_traced_memory()[1]
+    tracemalloc.stop()
+    return {
+        'bytes': len(markup),
+        'items': len(results),
+        'parse_ms': round(parse_time * 1000, 3),
+        'total_ms': round(total_time * 1000, 3),
+        'tag_ms': round(tag_time * 1000, 3),
+        'items_per_sec': round(len(results) / (total_time + tag_time), 1),
+        'peak_kib': round(peak / 1024, 1)
+    }
+
+def speedup(result, base):
+    if not base['items_per_sec']:
+        return None
+    return result['items_per_sec'] / base['items_per_sec']
+
+def too_slow(result, base, tolerance):
+    ratio = speedup(result, base)
+    return ratio is not None and ratio < 1 - tolerance
+
+def compare(key, result, base, tolerance):
+    problems = []
+    if result['items'] != base['items']:
+        problems.append(f"{key}: {result['items']} items, baseline had {base['items']}")
+    if base['peak_kib'] and result['peak_kib'] > base['peak_kib'] * (1 + tolerance):
+        problems.append(f"{key}: peak {result['peak_kib']:.0f} KiB, baseline {base['peak_kib']:.0f}")
+    return problems
+
+def confirm_speed(case, result, base, args):
+    # Keep the best of the original run and up to --confirm more, stopping
+    # as soon as one is back within the tolerance
+    for _ in range(args.confirm):
+        if not too_slow(result, base, args.tolerance):
+            break
+        rerun = run_case(*case, args.repeat, args.min_time)
+        if rerun['items_per_sec'] > result['items_per_sec']:
+            result = rerun
+    return result
+
+def environment():
+    import bs4
+    try:
+        import lxml.etree
+        lxml_version = '.'.join(map(str, lxml.etree.LXML_VERSION))
+    except ImportError:
+        lxml_version = None
+    return {'python': platform.python_version(), 'machine': platform.machine(), 'bs4': bs4.__version__, 'lxml': lxml_version}
+
+def main():
+    parser = argparse.ArgumentParser(description='Offline scraper parse benchmark')
+    parser.add_argument('--sources', help='comma separated source names (default: every fixture)')
+    parser.add_argument('--parsers', help=f"comma separated HTML backends (default: installed ones of {', '.join(HTML_PARSERS)})")
+    parser.add_argument('--sizes', default='1,4,16', help='fixture multipliers (default: 1,4,16)')
+    parser.add_argument('--repeat', type=int, default=5, help='minimum runs per timing, the best one counts (default: 5)')
+    parser.add_argument('--min-time', type=float, default=0.25, help='keep repeating a timing for at least this many seconds (default: 0.25)')
+    parser.add_argument('--baseline', default=BASELINE, help='baseline JSON to compare with or save to')
+    parser.add_argument('--save-baseline', action='store_true', help='write the results as the new baseline')
+    parser.add_argument('--tolerance', type=float, default=0.3, help='allowed slowdown or memory growth (default: 0.3)')
+    parser.add_argument('--confirm', type=int, default=2, help='extra runs for a case that comes in slow (default: 2)')
+    parser.add_argument('--strict-timing', action='store_true', help='fail on slowdowns too, not only on item counts and memory')
+    args = parser.parse_args()
+
+    sources = args.sources.split(',') if args.sources else [spec['name'] for spec in app.SOURCE_SPECS] + list(JSON_SOURCES)
+    installed = available_parsers()
+    parsers = [p for p in args.parsers.split(',') if p in installed] if args.parsers else installed
+    sizes = [int(size) for size in args.sizes.split(',')]
+
+    baseline = {}
+    if not args.save_baseline and os.path.exists(args.baseline):
+        with open(args.baseline, encoding='utf-8') as f:
+            baseline = json.load(f).get('results', {})
+
+    results = {}
+    problems = []
+    slow = []
+    print(f"{'case':<44} {'KiB':>7} {'items':>6} {'parse ms':>9} {'total ms':>9} {'tag ms':>7} {'items/s':>9} {'peak KiB':>9} {'vs base':>8}")
+    for case in build_cases(sources, parsers, sizes):
+        name, backend, size = case[:3]
+        key = f'{name}/{backend}/x{size}'
+        result = run_case(*case, args.repeat, args.min_time)
+        base = baseline.get(key)
+        if base:
+            result = confirm_speed(case, result, base, args)
+            problems.extend(compare(key, result, base, args.tolerance))
+            if too_slow(result, base, args.tolerance):
+                slow.append(f"{key}: {result['items_per_sec']:.0f} items/s, {speedup(result, base):.2f}x the baseline {base['items_per_sec']:.0f}")
+        results[key] = result
+        ratio = speedup(result, base) if base else None
+        ratio = f'{ratio:.2f}x' if ratio is not None else '-'
+        print(f"{key:<44} {result['bytes'] / 1024:>7.1f} {result['items']:>6} {result['parse_ms']:>9.2f} {result['total_ms']:>9.2f} "
+              f"{result['tag_ms']:>7.2f} {result['items_per_sec']:>9.0f} {result['peak_kib']:>9.0f} {ratio:>8}")
+
+    if args.save_baseline:
+        with open(args.baseline, 'w', encoding='utf-8') as f:
+            json.dump({'environment': environment(), 'results': results}, f, indent=2, sort_keys=True)
+            f.write('\n')
+        print(f"Saved {len(results)} cases to {args.baseline}")
+        return 0
+    if not baseline:
+        print(f"No baseline at {args.baseline}; run with --save-baseline to record one")
+        return 0
+    if args.strict_timing:
+        problems.extend(slow)
+    elif slow:
+        print(f"\n{len(slow)} case(s) slower than {args.baseline} (not failing without --strict-timing):")
+        for line in slow:
+            print(f"  {line}")
+    if problems:
+        print(f"\n{len(problems)} regression(s) against {args.baseline}:")
+        for problem in problems:
+            print(f"  {problem}")
+        return 1
+    print(f"\nNo regressions against {args.baseline} (tolerance {args.tolerance:.0%})")
+    return 0
+
+if __name__ == '__main__':
+    sys.exit(main())
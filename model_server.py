@@ -0,0 +1,112 @@
+import json
+import logging
+import os
+import queue
+import socket
+import sys
+import threading
+
+logging.basicConfig(level=os.getenv('LOG_LEVEL', 'INFO').upper(), format='%(asctime)s %(levelname)s:%(name)s: %(message)s')
+logger = logging.getLogger('model_server')
+
+# Owns the t5-small pipeline so torch never runs inside the eventlet web
+# process. Requests are one JSON line per connection:
+#   {"texts": [...], "max_length": 60, "min_length": 10}
+# and get {"summaries": [...]} or {"error": "..."} back. The socket is bound
+# before the model loads so clients can tell a starting server from a dead
+# one: until the pipeline is ready every request gets {"error": "loading"},
+# and when the job queue is full {"error": "busy"}, both straight away.
+
+def load_summarizer():
+    from transformers import pipeline
+    logger.info("Loading t5-small pipeline")
+    summarizer = pipeline("summarization", model="t5-small", device="cpu")
+    logger.info("t5-small pipeline loaded")
+    return summarizer
+
+def already_running(path):
+    probe = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+    try:
+        probe.connect(path)
+        return True
+    except OSError:
+        return False
+    finally:
+        probe.close()
+
+def reply(conn, response):
+    try:
+        conn.sendall((json.dumps(response) + '\n').encode('utf-8'))
+    except OSError as e:
+        logger.warning(f"Client went away before the reply: {e}")
+
+def handle_connection(conn, jobs, loaded):
+    with conn:
+        try:
+            line = conn.makefile('r', encoding='utf-8').readline()
+            if not line:
+                return  # a liveness probe, nothing to answer
+            request = json.loads(line)
+        except (OSError, ValueError) as e:
+            reply(conn, {'error': f'bad request: {e}'})
+            return
+        if not loaded.is_set():
+            reply(conn, {'error': 'loading'})
+            return
+        job = {'request': request, 'done': threading.Event(), 'response': None}
+        try:
+            jobs.put_nowait(job)
+        except queue.Full:
+            reply(conn, {'error': 'busy'})
+            return
+        job['done'].wait()
+        reply(conn, job['response'])
+
+def run_jobs(summarizer, jobs):
+    while True:
+        job = jobs.get()
+        request = job['request']
+        try:
+            results = summarizer(
+                request['texts'],
+                max_length=request['max_length'],
+                min_length=request['min_length'],
+                do_sample=False,
+                truncation=True,
+                batch_size=request.get('batch_size', 8)
+            )
+            job['response'] = {'summaries': [result['summary_text'].strip() for result in results]}
+        except Exception as e:
+            logger.error(f"Summarization failed: {e}", exc_info=True)
+            job['response'] = {'error': str(e)}
+        job['done'].set()
+
+def accept_connections(server, jobs, loaded):
+    while True:
+        conn, _ = server.accept()
+        threading.Thread(target=handle_connection, args=(conn, jobs, loaded), daemon=True).start()
+
+def serve(path, queue_size=32, summarizer=None):
+    if already_running(path):
+        logger.info(f"Model server already listening on {path}")
+        return
+    if os.path.exists(path):
+        os.unlink(path)
+    server = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+    try:
+        server.bind(path)
+    except OSError as e:
+        logger.info(f"Model server could not bind {path}: {e}")
+        return
+    server.listen(64)
+    logger.info(f"Model server listening on {path} (queue size {queue_size})")
+    jobs = queue.Queue(maxsize=queue_size)
+    loaded = threading.Event()
+    threading.Thread(target=accept_connections, args=(server, jobs, loaded), daemon=True).start()
+    summarizer = summarizer or load_summarizer()
+    loaded.set()
+    run_jobs(summarizer, jobs)
+
+if __name__ == '__main__':
+    socket_path = sys.argv[1] if len(sys.argv) > 1 else os.getenv('MODEL_SOCKET', '/tmp/trendy-model.sock')
+    serve(socket_path, int(os.getenv('MODEL_QUEUE_SIZE', '32')))
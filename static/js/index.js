@@ -0,0 +1,258 @@
+document.getElementById('desktop-filters-toggle')?.addEventListener('click', () => {
+  document.getElementById('desktop-filters')?.classList.toggle('collapsed');
+});
+
+const allSourcesCheckbox = document.getElementById('all-sources');
+const allSourcesCheckboxDesktop = document.getElementById('all-sources-desktop');
+const checkboxes = document.querySelectorAll('.source-checkbox');
+const trendList = document.getElementById('trend-list');
+const sentinel = document.getElementById('trend-sentinel');
+const loadedIds = new Set(Array.from(trendList.querySelectorAll('.card[data-id]')).map(card => card.dataset.id));
+let nextOffset = trendList.dataset.nextOffset;
+let loading = false;
+let requestToken = 0;
+
+// Returns null when every source is selected (no filter)
+function selectedSources() {
+  if (Array.from(checkboxes).every(c => c.checked)) return null;
+  return Array.from(new Set(Array.from(checkboxes).filter(c => c.checked).map(c => c.value)));
+}
+
+// Cards beyond the first page come from /trends/page as HTML fragments,
+// filtered server-side by source
+function loadMore(reset) {
+  if (!reset && (loading || !nextOffset)) return;
+  const sources = selectedSources();
+  if (reset) {
+    trendList.innerHTML = '';
+    loadedIds.clear();
+    nextOffset = '';
+    if (sources && !sources.length) {
+      requestToken++;
+      loading = false;
+      return;
+    }
+  }
+  loading = true;
+  const token = ++requestToken;
+  const params = new URLSearchParams({ variant: trendList.dataset.variant, offset: reset ? 0 : nextOffset });
+  (sources || []).forEach(source => params.append('source', source));
+  fetch('/trends/page?' + params)
+    .then(res => {
+      if (token !== requestToken) return '';
+      nextOffset = res.headers.get('X-Next-Offset') || '';
+      // A fresh list is whatever snapshot this worker served
+      if (reset) generation = res.headers.get('X-Generation') || generation;
+      return res.text();
+    })
+    .then(html => {
+      if (token !== requestToken) return;
+      const holder = document.createElement('div');
+      holder.innerHTML = html;
+      const newIds = [];
+      holder.querySelectorAll('.card[data-id]').forEach(card => {
+        if (loadedIds.has(card.dataset.id)) return;
+        loadedIds.add(card.dataset.id);
+        newIds.push(card.dataset.id);
+        trendList.appendChild(card);
+      });
+      refreshTimes(trendList);
+      hydrateVoteCounts(newIds);
+    })
+    .catch(err => console.error('Could not load more trends:', err))
+    .finally(() => { if (token === requestToken) loading = false; });
+}
+
+new IntersectionObserver(entries => {
+  if (entries.some(entry => entry.isIntersecting)) loadMore(false);
+}, { rootMargin: '600px' }).observe(sentinel);
+
+// Sync logic for both "All Sources" checkboxes
+function syncAllSourcesCheckboxes(isChecked) {
+  if (allSourcesCheckbox) allSourcesCheckbox.checked = isChecked;
+  if (allSourcesCheckboxDesktop) allSourcesCheckboxDesktop.checked = isChecked;
+}
+
+// Toggle all sources ON/OFF from either "All Sources" checkbox
+[allSourcesCheckbox, allSourcesCheckboxDesktop].forEach(mainCb => {
+  mainCb?.addEventListener('change', () => {
+    const isChecked = mainCb.checked;
+    checkboxes.forEach(cb => cb.checked = isChecked);
+    syncAllSourcesCheckboxes(isChecked);
+    loadMore(true);
+  });
+});
+
+// Individual checkbox changes, mirrored between the mobile and desktop lists
+checkboxes.forEach(cb => {
+  cb.addEventListener('change', () => {
+    checkboxes.forEach(other => { if (other.value === cb.value) other.checked = cb.checked; });
+    const allChecked = Array.from(checkboxes).every(c => c.checked);
+    syncAllSourcesCheckboxes(allChecked);
+    loadMore(true);
+  });
+});
+
+// Theme switching
+const themes = ['light', 'dark', 'fun', 'solarized', 'neon'];
+let currentThemeIndex = 0;
+
+function applyTheme(theme) {
+  document.documentElement.setAttribute('data-theme', theme);
+  localStorage.setItem('trendii-theme', theme);
+}
+
+function loadTheme() {
+  const savedTheme = localStorage.getItem('trendii-theme');
+  if (savedTheme && themes.includes(savedTheme)) {
+    currentThemeIndex = themes.indexOf(savedTheme);
+    applyTheme(savedTheme);
+  } else {
+    applyTheme('light');
+  }
+}
+
+document.getElementById('theme-toggle')?.addEventListener('click', () => {
+  currentThemeIndex = (currentThemeIndex + 1) % themes.length;
+  applyTheme(themes[currentThemeIndex]);
+});
+
+// Vote counts are not part of the cached page, fill them in after load
+function hydrateVoteCounts(ids) {
+  if (!ids.length) return;
+  fetch('/api/votes?ids=' + encodeURIComponent(ids.join(',')))
+    .then(res => res.json())
+    .then(counts => {
+      ids.forEach(id => {
+        const card = trendList.querySelector(`.card[data-id="${id}"]`);
+        if (!card) return;
+        const trendCounts = counts[id] || {};
+        card.querySelectorAll('.vote-count').forEach(span => {
+          span.textContent = trendCounts[span.dataset.type] || 0;
+        });
+      });
+    })
+    .catch(err => console.error('Could not load vote counts:', err));
+}
+
+// Cards carry a UTC timestamp rather than "n minutes ago", which would go
+// stale in the cached page; the relative text is filled in and kept fresh here
+function timeAgo(timestamp) {
+  const seconds = Math.max(0, (Date.now() - Date.parse(timestamp)) / 1000);
+  if (seconds < 60) return `${Math.floor(seconds)} seconds ago`;
+  if (seconds < 3600) return `${Math.floor(seconds / 60)} minutes ago`;
+  if (seconds < 86400) return `${Math.floor(seconds / 3600)} hours ago`;
+  return `${Math.floor(seconds / 86400)} days ago`;
+}
+
+function refreshTimes(root) {
+  root.querySelectorAll('time.trend-time').forEach(time => {
+    if (!isNaN(Date.parse(time.dateTime))) time.textContent = timeAgo(time.dateTime);
+  });
+}
+
+// Same markup as sections/trend_card.html, built from the minimal card
+// data pushed over the trends channel
+function renderCard(trend) {
+  const card = document.createElement('article');
+  card.className = `card ${trend.source_class || ''}`;
+  card.dataset.id = trend.id;
+  const heading = document.createElement('h2');
+  const title = document.createElement('a');
+  title.href = `/trend/${trend.id}`;
+  title.textContent = trend.title;
+  heading.appendChild(title);
+  card.appendChild(heading);
+  if (trend.image) {
+    const image = document.createElement('img');
+    image.src = trend.image;
+    image.alt = `Image for ${trend.title}`;
+    image.loading = 'lazy';
+    card.appendChild(image);
+  }
+  if (trend.mood_tags && trend.mood_tags.length) {
+    const moods = document.createElement('div');
+    moods.className = 'mood-tags';
+    trend.mood_tags.forEach(tag => {
+      const badge = document.createElement('span');
+      badge.className = 'badge bg-primary';
+      badge.textContent = tag;
+      moods.appendChild(badge);
+    });
+    card.appendChild(moods);
+  }
+  const source = document.createElement('span');
+  source.className = `source ${trend.source_class || ''}`;
+  source.textContent = trend.source;
+  card.appendChild(source);
+  const trending = document.createElement('p');
+  const since = document.createElement('time');
+  since.className = 'trend-time';
+  since.dateTime = trend.timestamp || '';
+  since.textContent = isNaN(Date.parse(since.dateTime)) ? 'just now' : timeAgo(since.dateTime);
+  trending.append('Trending: ', since);
+  card.appendChild(trending);
+  const votes = document.createElement('div');
+  votes.className = 'votes d-flex gap-2';
+  [['thumbs_up', 'primary', '👍'], ['fire', 'danger', '🔥'], ['mind_blown', 'info', '😲']].forEach(([type, style, emoji]) => {
+    const button = document.createElement('button');
+    button.className = `vote-btn btn btn-outline-${style} btn-sm`;
+    button.dataset.type = type;
+    button.innerHTML = `${emoji} <span class="vote-count" data-type="${type}">0</span>`;
+    votes.appendChild(button);
+  });
+  card.appendChild(votes);
+  const more = document.createElement('a');
+  more.href = trend.link;
+  more.target = '_blank';
+  more.rel = 'noopener noreferrer';
+  more.className = 'btn btn-sm btn-outline-primary mt-3 align-self-start';
+  more.textContent = 'See More';
+  card.appendChild(more);
+  return card;
+}
+
+// Live updates: every fetch cycle pushes the ids that left the list and
+// cards for the ones that arrived. On reconnect the server replays what
+// was missed since our generation, or sends a reset if it does not know
+// it. Generations are hashes of the trend ids, so they only ever compare
+// for equality.
+let generation = trendList.dataset.generation || '';
+const socket = io({
+  path: '/socket.io',
+  transports: ['websocket', 'polling'],
+  reconnection: true,
+  reconnectionDelay: 1000
+});
+
+socket.on('connect', () => socket.emit('subscribe_trends', { generation }));
+
+socket.on('trends', delta => {
+  if (delta.generation === generation) return;
+  if (delta.previous !== generation) {
+    socket.emit('subscribe_trends', { generation });
+    return;
+  }
+  generation = delta.generation;
+  delta.removed.forEach(id => {
+    trendList.querySelector(`.card[data-id="${id}"]`)?.remove();
+    loadedIds.delete(id);
+  });
+  const sources = selectedSources();
+  const added = delta.added.filter(trend => !loadedIds.has(trend.id) && (!sources || sources.includes(trend.source)));
+  added.slice().reverse().forEach(trend => {
+    loadedIds.add(trend.id);
+    trendList.prepend(renderCard(trend));
+  });
+  hydrateVoteCounts(added.map(trend => trend.id));
+});
+
+socket.on('trends_reset', data => {
+  generation = data.generation;
+  loadMore(true);
+});
+
+loadTheme();
+refreshTimes(trendList);
+setInterval(() => refreshTimes(trendList), 30000);
+hydrateVoteCounts(Array.from(loadedIds));
@@ -0,0 +1,131 @@
+// Set random username suffix
+const usernameInput = document.getElementById('username');
+usernameInput.value = `Guest${Math.floor(Math.random() * 10000)}`;
+
+const socket = io({
+  path: '/socket.io',
+  transports: ['websocket', 'polling'],
+  reconnection: true,
+  reconnectionAttempts: 5,
+  reconnectionDelay: 1000
+});
+
+const trendId = document.body.dataset.trendId;
+let username = usernameInput.value;
+
+socket.on('connect', () => {
+  console.log(`Connected to Socket.IO with ID: ${socket.id}`);
+  socket.emit('join', { username, room: trendId });
+});
+
+socket.on('connect_error', (error) => {
+  console.error('Socket.IO connection error:', error);
+});
+
+function appendMessage(msg) {
+  const chatMessages = document.getElementById('chat-messages');
+  const messageElement = document.createElement('div');
+  messageElement.classList.add('chat-message');
+  messageElement.textContent = msg;
+  chatMessages.appendChild(messageElement);
+  chatMessages.scrollTop = chatMessages.scrollHeight;
+}
+
+// Recent messages sent before we joined; replayed once per join, so
+// clear what a previous connection showed first
+socket.on('history', (messages) => {
+  document.getElementById('chat-messages').innerHTML = '';
+  messages.forEach(appendMessage);
+});
+
+socket.on('message', (msg) => {
+  console.log(`Received message: ${msg}`);
+  appendMessage(msg);
+});
+
+socket.on('error', (data) => {
+  console.error('Server error:', data.message);
+  alert(`Chat error: ${data.message}`);
+});
+
+let lastMessageTime = 0;
+document.getElementById('send-message').addEventListener('click', () => {
+  const messageInput = document.getElementById('message');
+  const message = messageInput.value.trim();
+  username = usernameInput.value.trim() || 'Guest';
+  const now = Date.now();
+  if (now - lastMessageTime < 2000) {
+    alert('Please wait 2 seconds before sending another message.');
+    return;
+  }
+  if (!message) {
+    alert('Message cannot be empty.');
+    return;
+  }
+  if (message.length > 200) {
+    alert('Message too long (max 200 characters).');
+    return;
+  }
+  lastMessageTime = now;
+  console.log(`Sending message: ${username}: ${message} to room ${trendId}`);
+  socket.emit('message', { username, message, room: trendId });
+  messageInput.value = '';
+});
+
+document.getElementById('message').addEventListener('keypress', (e) => {
+  if (e.key === 'Enter') {
+    document.getElementById('send-message').click();
+  }
+});
+
+window.addEventListener('beforeunload', () => {
+  socket.emit('leave', { username, room: trendId });
+});
+
+document.querySelectorAll('.vote-btn').forEach(button => {
+  button.addEventListener('click', () => {
+    const voteType = button.getAttribute('data-type');
+
+    fetch('/api/vote', {
+      method: 'POST',
+      headers: { 'Content-Type': 'application/json' },
+      body: JSON.stringify({ trend_id: trendId, vote_type: voteType }),
+    })
+      .then(res => res.json())
+      .then(data => {
+        if (!data.error) {
+          document.querySelectorAll('.vote-count').forEach(span => {
+            const type = span.getAttribute('data-type');
+            span.textContent = data[type] || 0;
+          });
+        } else {
+          alert('Error: ' + data.error);
+        }
+      });
+  });
+});
+
+const themes = ['light', 'dark', 'fun', 'solarized', 'neon'];
+let currentThemeIndex = 0;
+
+function applyTheme(theme) {
+  document.documentElement.setAttribute('data-theme', theme);
+  localStorage.setItem('trendii-theme', theme);
+}
+
+function loadTheme() {
+  const savedTheme = localStorage.getItem('trendii-theme');
+  if (savedTheme && themes.includes(savedTheme)) {
+    currentThemeIndex = themes.indexOf(savedTheme);
+    applyTheme(savedTheme);
+  } else {
+    applyTheme('light');
+  }
+}
+
+document.getElementById('theme-toggle').addEventListener('click', () => {
+  currentThemeIndex = (currentThemeIndex + 1) % themes.length;
+  applyTheme(themes[currentThemeIndex]);
+});
+
+loadTheme();